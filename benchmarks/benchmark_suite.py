@@ -0,0 +1,270 @@
+"""Measures rendering, queue operations, and persistence at several queue sizes.
+
+Run with `python benchmarks/benchmark_suite.py` from the project's folder. Each
+result is printed as one line of JSON, such as
+
+    {"benchmark": "get_timer_message/individual", "size": 100, "median_ms": ...}
+
+so the results of two runs can be compared by scripts. To check for regressions,
+save the results of a run with `--output baseline.jsonl` and later run with
+`--baseline baseline.jsonl`. Any benchmark with a median more than `--threshold`
+times its baseline is reported, and the exit code is 1.
+
+The text browser and startup benchmarks need PySide6 and run with
+QT_QPA_PLATFORM=offscreen, so no window is shown. They are skipped if PySide6 is
+not installed. The startup benchmark runs the app with --startup-profile and
+measures the time until its window is first painted; its size is 0.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "zq"))
+from common import convert_Rich_style_to_html  # noqa: E402
+from common import get_mode_names  # noqa: E402
+from common import get_timer_message  # noqa: E402
+from common import Mode  # noqa: E402
+from common import SessionState  # noqa: E402
+from common import StudentQueue  # noqa: E402
+from engine import Engine  # noqa: E402
+from events import EventLog  # noqa: E402
+from storage import Storage  # noqa: E402
+
+
+APP_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "zq")
+SIZES = (10, 100, 1_000, 10_000)
+MAX_INDIVIDUAL_SECONDS = 20 * 60 + 30
+MODE_NAMES = get_mode_names(20)
+app = None  # the QApplication, which must exist while widgets are used
+
+
+def measure(function, min_seconds: float = 0.2, max_repeats: int = 1000) -> dict:
+    """Runs a function repeatedly and returns statistics of its run times in ms.
+
+    It runs at least 5 times and until either min_seconds have passed or it ran
+    max_repeats times.
+    """
+    times = []
+    total = 0.0
+    while len(times) < 5 or (total < min_seconds and len(times) < max_repeats):
+        start = perf_counter()
+        function()
+        elapsed = perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+    times.sort()
+    return {
+        "median_ms": round(times[len(times) // 2] * 1000, 6),
+        "min_ms": round(times[0] * 1000, 6),
+        "repeats": len(times),
+    }
+
+
+def make_queue(size: int) -> StudentQueue:
+    """Creates a queue of students with a 5-minute break every 10 entries."""
+    return StudentQueue.from_names(
+        "5-minute break" if i % 10 == 9 else f"student {i}" for i in range(size)
+    )
+
+
+def get_rich_waitlist(queue: StudentQueue) -> str:
+    """Creates Rich-styled text like the timer message before it was precompiled."""
+    return "".join(
+        f"[#00ff00]{seconds // 60}:{seconds % 60:02}[/#00ff00] {entry.name}\n\n"
+        for entry, seconds in queue.iter_waiting(MAX_INDIVIDUAL_SECONDS)
+    )
+
+
+def bench_common(size: int):
+    queue = make_queue(size)
+    for mode in (Mode.GROUP, Mode.INDIVIDUAL):
+        yield f"get_timer_message/{mode.name.lower()}", measure(
+            lambda: get_timer_message(
+                mode, MODE_NAMES, queue, 0, 1000, MAX_INDIVIDUAL_SECONDS
+            )
+        )
+    # This runs whenever compile_Rich_style misses its cache, such as for the help
+    # text or new messages from the settings.
+    rich_text = get_rich_waitlist(queue)
+    yield "convert_Rich_style_to_html", measure(
+        lambda: convert_Rich_style_to_html(rich_text)
+    )
+
+
+def make_engine(size: int, storage=None, events=None) -> Engine:
+    engine = Engine(storage, events=events)
+    engine.append_names(entry.name for entry in make_queue(size))
+    return engine
+
+
+def bench_engine(size: int):
+    """Measures what each timer tick and the n and z keys cost without any GUI."""
+    with tempfile.TemporaryDirectory() as folder:
+        for storage_name, storage in (
+            ("memory", None),
+            ("sqlite", Storage(os.path.join(folder, "students.db"))),
+        ):
+            events = EventLog(os.path.join(folder, f"{storage_name}.jsonl"))
+            engine = make_engine(size, storage, events)
+
+            def next_and_previous():
+                engine.next_student()
+                engine.previous_student()
+
+            # This includes saving each change, recording how to undo it, and
+            # logging its events.
+            yield f"Engine.next_student+previous_student/{storage_name}", measure(
+                next_and_previous, max_repeats=200
+            )
+            engine.close()
+
+    engine = make_engine(size)
+    engine.toggle_mode()
+    engine.toggle_pause()
+    now = [1000.0]
+
+    def tick():
+        now[0] += 1
+        engine.tick(now[0])
+        get_timer_message(
+            engine.current_mode,
+            MODE_NAMES,
+            engine.queue,
+            engine.group_seconds,
+            engine.individual_seconds,
+            engine.meeting_seconds,
+        )
+
+    yield "engine_tick+get_timer_message", measure(tick)
+
+
+def bench_text_browser(size: int):
+    global app
+    from PySide6.QtWidgets import QApplication
+    from text_browser import MyTextBrowser
+
+    app = QApplication.instance() or QApplication([])
+    queue = make_queue(size)
+    browser = MyTextBrowser()
+    messages = [
+        get_timer_message(
+            Mode.INDIVIDUAL, MODE_NAMES, queue, 0, seconds, MAX_INDIVIDUAL_SECONDS
+        )
+        for seconds in (1000, 999)
+    ]
+    rich_text = get_rich_waitlist(queue)
+    yield "MyTextBrowser.set_text", measure(
+        lambda: browser.set_text(rich_text), max_repeats=50
+    )
+    browser.update_html(messages[1])
+    count = [0]
+
+    def update():
+        count[0] += 1
+        browser.update_html(messages[count[0] % 2])
+
+    yield "MyTextBrowser.update_html/tick", measure(update, max_repeats=200)
+
+
+def bench_storage(size: int):
+    queue = make_queue(size)
+    session = SessionState(Mode.INDIVIDUAL, False, 1000, 0, None)
+    with tempfile.TemporaryDirectory() as folder:
+        storage = Storage(os.path.join(folder, "students.db"))
+
+        def round_trip():
+            storage.save_all(queue)
+            storage.save_session(session)
+            storage.load()
+
+        yield "storage save_all+load", measure(round_trip, max_repeats=50)
+        yield "storage rotate", measure(lambda: storage.rotate(True))
+        storage.close()
+
+
+def bench_startup():
+    """Measures the time from starting the app to its first frame."""
+    times = []
+    with tempfile.TemporaryDirectory() as folder:
+        for _ in range(5):
+            process = subprocess.run(
+                [sys.executable, os.path.abspath(APP_PATH), "--startup-profile"],
+                cwd=folder,
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+            match = re.search(r"first frame\s+\S+\s+(\S+) total", process.stderr)
+            if match is None:
+                print(process.stderr, file=sys.stderr)
+                return
+            times.append(float(match[1]))
+    times.sort()
+    yield "startup/first frame", {
+        "median_ms": times[len(times) // 2],
+        "min_ms": times[0],
+        "repeats": len(times),
+    }
+
+
+def compare(results: list[dict], baseline_path: str, threshold: float) -> bool:
+    """Reports benchmarks slower than their baseline and returns whether any are."""
+    with open(baseline_path, "r", encoding="utf8") as file:
+        baseline = {
+            (result["benchmark"], result["size"]): result["median_ms"]
+            for result in map(json.loads, file)
+        }
+    regressed = False
+    for result in results:
+        old = baseline.get((result["benchmark"], result["size"]))
+        if old and result["median_ms"] > old * threshold:
+            regressed = True
+            print(
+                f"regression: {result['benchmark']} at size {result['size']} took"
+                f" {result['median_ms']:.3f} ms, up from {old:.3f} ms",
+                file=sys.stderr,
+            )
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--baseline", help="the results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    options = parser.parse_args()
+    groups = [bench_common, bench_engine, bench_storage]
+    try:
+        import PySide6  # noqa: F401
+    except ImportError:
+        print("PySide6 is not installed; skipping MyTextBrowser", file=sys.stderr)
+    else:
+        groups.append(bench_text_browser)
+    results = []
+    if bench_text_browser in groups:
+        for name, stats in bench_startup():
+            result = {"benchmark": name, "size": 0, **stats}
+            results.append(result)
+            print(json.dumps(result), flush=True)
+    for size in options.sizes:
+        for group in groups:
+            for name, stats in group(size):
+                result = {"benchmark": name, "size": size, **stats}
+                results.append(result)
+                print(json.dumps(result), flush=True)
+    if options.output:
+        with open(options.output, "w", encoding="utf8") as file:
+            file.writelines(json.dumps(result) + "\n" for result in results)
+    if options.baseline and compare(results, options.baseline, options.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measures the latency of loading and saving the queue with 10,000 students.
+
+Run with `python benchmarks/storage_benchmark.py` from the project's folder. The
+database is created in a temporary folder. The old approach of opening a new
+connection for each query is measured too for comparison.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "zq"))
+from common import Mode  # noqa: E402
+from common import SessionState  # noqa: E402
+from common import Student  # noqa: E402
+from common import StudentQueue  # noqa: E402
+from storage import Storage  # noqa: E402
+
+
+ROWS = 10_000
+REPEATS = 20
+
+
+def measure(name: str, function, repeats: int = REPEATS) -> None:
+    """Prints the median time that a function takes to run."""
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    times.sort()
+    print(f"{name:<45} {times[len(times) // 2] * 1000:>10.3f} ms")
+
+
+def old_load() -> None:
+    with sqlite3.connect("legacy.db") as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM students")
+        StudentQueue.from_names(row[0] for row in cursor.fetchall())
+        cursor.execute("SELECT seconds FROM students")
+        cursor.fetchall()[0][0]
+
+
+def old_save(names: list[str]) -> None:
+    with sqlite3.connect("legacy.db") as conn:
+        conn.execute("DELETE FROM students")
+        cursor = conn.cursor()
+        for name in names:
+            cursor.execute(
+                "INSERT INTO students (name, seconds) VALUES (?, ?)", (name, 1200)
+            )
+        conn.commit()
+
+
+def main() -> None:
+    os.chdir(tempfile.mkdtemp())
+    names = [f"student {i}" for i in range(ROWS)]
+    with sqlite3.connect("legacy.db") as conn:
+        conn.execute(
+            "CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+            "seconds INTEGER NOT NULL)"
+        )
+    old_save(names)
+    queue = StudentQueue.from_names(names)
+    session = SessionState(Mode.INDIVIDUAL, False, 1200, 0, None)
+    storage = Storage()
+    storage.save_all(queue)
+    storage.save_session(session)
+    print(f"{ROWS} rows, median of {REPEATS} runs")
+    measure("load (one connection, one transaction)", storage.load)
+    measure("load (new connection, two queries)", old_load)
+    measure("save all (one connection, executemany)", lambda: storage.save_all(queue))
+    measure("save all (new connection, execute per row)", lambda: old_save(names))
+    measure("append one name", lambda: storage.append(Student("new")), 200)
+    measure("remove last name", storage.remove_last, 200)
+    measure("rotate forwards", lambda: storage.rotate(True), 200)
+    measure("save timers and mode", lambda: storage.save_session(session), 200)
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
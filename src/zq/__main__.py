@@ -1,7 +1,23 @@
-try:
-    from app import main
-except ImportError:
-    from zq.app import main
+import sys
+from time import perf_counter
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ["serve"]:
+        try:
+            from server import main as serve
+        except ImportError:
+            from zq.server import main as serve
+        serve(sys.argv[2:])
+    elif sys.argv[1:2] == ["stats"]:
+        try:
+            from events import main as stats
+        except ImportError:
+            from zq.events import main as stats
+        stats(sys.argv[2:])
+    else:
+        start = perf_counter()
+        try:
+            from app import main
+        except ImportError:
+            from zq.app import main
+        main(start)
@@ -1,16 +1,94 @@
 import sys
-from importlib import metadata as importlib_metadata
+from time import perf_counter
 
+from PySide6.QtCore import QEvent
+from PySide6.QtCore import QObject
+from PySide6.QtCore import QTimer
 from PySide6.QtGui import QColor
 from PySide6.QtWidgets import QApplication
 
+try:
+    from settings import settings
+except ImportError:
+    from .settings import settings
 try:
     from zq import ZQ
 except ImportError:
     from .zq import ZQ
 
 
-def main():
+# This must match the formal_name in pyproject.toml. It is not read from the app's
+# metadata because finding the metadata is slow.
+FORMAL_NAME = "zq"
+
+
+class StartupProfiler(QObject):
+    """Prints how long each step of starting the app took, then quits the app.
+
+    The last step ends when the main window is first painted.
+    """
+
+    def __init__(self, start: float):
+        super().__init__()
+        self.__marks = [("start", start)]
+
+    def mark(self, step: str) -> None:
+        """Records that a step just ended."""
+        self.__marks.append((step, perf_counter()))
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if event.type() == QEvent.Paint:
+            watched.removeEventFilter(self)
+            # The window's children are painted right after the window itself.
+            QTimer.singleShot(0, self.__finish)
+        return False
+
+    def __finish(self) -> None:
+        self.mark("first frame")
+        start = self.__marks[0][1]
+        print("startup profile (ms):", file=sys.stderr)
+        for (_, previous), (step, time) in zip(self.__marks, self.__marks[1:]):
+            print(
+                f"  {step:<16}{(time - previous) * 1000:>9.1f}"
+                f"{(time - start) * 1000:>9.1f} total",
+                file=sys.stderr,
+            )
+        QApplication.quit()
+
+
+def pop_option(name: str) -> str | None:
+    """Removes an option and its value from sys.argv and returns the value."""
+    if name not in sys.argv[:-1]:
+        return None
+    i = sys.argv.index(name)
+    value = sys.argv.pop(i + 1)
+    sys.argv.pop(i)
+    return value
+
+
+def main(start: float | None = None):
+    """Runs the app.
+
+    Parameters
+    ----------
+    start : float | None
+        The perf_counter time when the app started, before its modules were
+        imported. If the --startup-profile argument was given, the time each step of
+        starting took since then is printed and the app quits.
+
+    If the --import argument is given with the path to a text or CSV file, each name
+    in the file is added to the queue. For a CSV file with more than one column, the
+    --import-column argument can choose the column of names by its header or its
+    number starting from 1.
+    """
+    import_path = pop_option("--import")
+    import_column = pop_option("--import-column")
+    profiler = None
+    if "--startup-profile" in sys.argv:
+        sys.argv.remove("--startup-profile")
+        profiler = StartupProfiler(perf_counter() if start is None else start)
+        profiler.mark("imports")
+
     # Linux desktop environments use app's .desktop file to integrate the app
     # to their application menus. The .desktop file of this app will include
     # StartupWMClass key, set to app's formal name, which helps associate
@@ -19,26 +97,33 @@ def main():
     # For association to work any windows of the app must have WMCLASS
     # property set to match the value set in app's desktop file. For PySide2
     # this is set with setApplicationName().
+    QApplication.setApplicationName(FORMAL_NAME)
 
-    # Find the name of the module that was used to start the app
-    app_module = sys.modules["__main__"].__package__
-    # Retrieve the app's metadata
-    metadata = importlib_metadata.metadata(app_module)
-
-    QApplication.setApplicationName(metadata["Formal-Name"])
-
+    settings.load()
+    if profiler is not None:
+        profiler.mark("settings")
     app = QApplication(sys.argv)
     app.setStyleSheet(
         """
-            QTextBrowser {
+            QTextBrowser, QListView {
                 border: none;
                 color: rgb(255, 255, 255);
                 background-color: rgb(30, 30, 30);
             }
         """
     )
+    if profiler is not None:
+        profiler.mark("QApplication")
     main_window = ZQ()
     p = main_window.palette()
     p.setColor(main_window.backgroundRole(), QColor(30, 30, 30))
     main_window.setPalette(p)
+    if import_path is not None:
+        try:
+            main_window.import_names(import_path, import_column)
+        except (OSError, ValueError) as e:
+            print(f"Could not import names: {e}", file=sys.stderr)
+    if profiler is not None:
+        profiler.mark("main window")
+        main_window.installEventFilter(profiler)
     sys.exit(app.exec())
@@ -0,0 +1,101 @@
+import os
+import platform
+import shlex
+import threading
+from importlib.util import find_spec
+from queue import SimpleQueue
+from time import perf_counter
+
+try:
+    from PySide6.QtCore import QUrl
+    from PySide6.QtMultimedia import QSoundEffect
+except ImportError:  # QtMultimedia is in the optional PySide6-Addons package.
+    QSoundEffect = None
+
+try:
+    import instrumentation
+except ImportError:
+    from . import instrumentation
+
+if platform.system() == "Windows":
+    import winsound
+
+
+SOUND_NAMES = ("warning", "error")
+
+
+def get_theme_dir(theme: str) -> str:
+    """Returns the folder of a sound theme.
+
+    Parameters
+    ----------
+    theme : str
+        Either the path to a folder with warning.wav and error.wav files, or the name
+        of one of chime's themes, such as "material".
+    """
+    if os.path.isdir(theme):
+        return theme
+    # This is where chime.themes_dir() is, but importing chime takes a long time
+    # because it imports IPython.
+    chime_path = find_spec("chime").origin  # https://pypi.org/project/chime/
+    return os.path.join(os.path.dirname(chime_path), "themes", theme)
+
+
+class AlertPlayer:
+    """Plays alert sounds without ever blocking the event loop.
+
+    Each sound is loaded once when the player is created. If QtMultimedia is
+    installed, QSoundEffect decodes the sounds ahead of time and plays them
+    asynchronously. Otherwise, the files are read into memory and a worker thread
+    plays them.
+    """
+
+    def __init__(self, theme: str):
+        self.theme = theme
+        theme_dir = get_theme_dir(theme)
+        paths = {name: os.path.join(theme_dir, f"{name}.wav") for name in SOUND_NAMES}
+        paths = {name: path for name, path in paths.items() if os.path.isfile(path)}
+        self.__effects = {}
+        self.__sounds = {}
+        if QSoundEffect is not None:
+            for name, path in paths.items():
+                effect = QSoundEffect()
+                effect.setSource(QUrl.fromLocalFile(path))
+                self.__effects[name] = effect
+        else:
+            for name, path in paths.items():
+                with open(path, "rb") as file:
+                    self.__sounds[name] = (path, file.read())
+            self.__requests = SimpleQueue()
+            threading.Thread(target=self.__play_requests, daemon=True).start()
+
+    def warning(self) -> None:
+        self.play("warning")
+
+    def error(self) -> None:
+        self.play("error")
+
+    @instrumentation.timed("AlertPlayer.play")
+    def play(self, name: str) -> None:
+        """Starts playing a sound and returns immediately."""
+        if name in self.__effects:
+            self.__effects[name].play()
+        elif name in self.__sounds:
+            self.__requests.put(name)
+
+    def __play_requests(self) -> None:
+        """Plays requested sounds one at a time; runs in the worker thread."""
+        while True:
+            path, data = self.__sounds[self.__requests.get()]
+            start = perf_counter()
+            try:
+                if platform.system() == "Windows":
+                    winsound.PlaySound(data, winsound.SND_MEMORY)
+                else:
+                    import chime  # imported only when needed because it is slow
+
+                    chime.play_wav(shlex.quote(path), sync=True, raise_error=False)
+            except RuntimeError as e:
+                print(f"Could not play {path}: {e}")
+            if instrumentation.ENABLED:
+                instrumentation.record("audio playback", perf_counter() - start)
@@ -1,10 +1,24 @@
+import csv
+import html
+import math
+import random
 import re
-import sqlite3
+from bisect import bisect_left
+from bisect import insort
+from collections import deque
+from collections.abc import Iterable
+from collections.abc import Iterator
 from enum import Enum
+from functools import lru_cache
+from itertools import chain
+from itertools import islice
 from textwrap import dedent
+from time import monotonic
 
 
 VERSION = "1.0.2"
+# matches column headers like "Name", "Full name", or "What is your name?"
+name_header_pattern = re.compile(r"\bnames?\b", re.IGNORECASE)
 color_pattern = re.compile(
     r"\[(?P<color>#[0-9a-fA-F]{6})\](?P<body>[^\[]*?)\[/(?:#[0-9a-fA-F]{6})?\]"
 )
@@ -36,6 +50,19 @@ def convert_Rich_style_to_html(text: str) -> str:
     return text
 
 
+@lru_cache(maxsize=64)
+def compile_Rich_style(text: str) -> str:
+    """Converts Rich style tags to HTML tags and caches the result.
+
+    Use this for text that is shown many times, such as the help text or the
+    messages in the settings. Text can also be a template with str.format fields
+    like {name} that are filled in after converting, so only the fields' values
+    need to be created each time the text is shown. The cache should be cleared
+    whenever the settings change.
+    """
+    return convert_Rich_style_to_html(text)
+
+
 class Mode(Enum):
     """Meeting modes."""
 
@@ -45,90 +72,637 @@ class Mode(Enum):
     END = 3
 
 
-def create_students_table() -> None:
-    """Creates the students table in the database.
+class Student:
+    """A student in the queue."""
+
+    __slots__ = ("name", "html_name")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.html_name = html.escape(name)  # escaped once instead of each render
+
+    def __repr__(self) -> str:
+        return f"Student({self.name!r})"
+
+
+class Break:
+    """A break in the queue."""
+
+    __slots__ = ("minutes",)
+
+    def __init__(self, minutes: int):
+        self.minutes = minutes
+
+    def __repr__(self) -> str:
+        return f"Break({self.minutes})"
 
-    Assumes the database does not exist. The seconds column will have the
-    same value in every row: the remaining seconds of the next waiting student.
+    @property
+    def name(self) -> str:
+        return f"{self.minutes}-minute break"
+
+    html_name = name  # break names have nothing to escape
+
+    @property
+    def seconds(self) -> int:
+        return self.minutes * 60
+
+
+def parse_queue_entry(name: str) -> Student | Break:
+    """Creates a queue entry from a name, such as one loaded from the database.
+
+    Names like "10-minute break" become breaks.
     """
-    with sqlite3.connect("students.db") as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE students (
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                seconds INTEGER NOT NULL);
-            """
-        )
-        conn.commit()
-
-
-def load_students(max_meeting_seconds: int) -> tuple[list[str], int]:
-    """Loads student names and wait times from the database."""
-    try:
-        with sqlite3.connect("students.db") as conn:
-            cursor = conn.cursor()
-            try:
-                cursor.execute("SELECT name FROM students")
-                student_names = [row[0] for row in cursor.fetchall()]
-                cursor.execute("SELECT seconds FROM students")
-                individual_seconds = cursor.fetchall()[0][0]
-                return student_names, individual_seconds
-            except IndexError:
-                pass
-    except sqlite3.OperationalError:
-        create_students_table()
-    return [], max_meeting_seconds
-
-
-def add_5_minute_break(names: list[str]) -> int:
-    """Adds a 5-minute break to the end of the list of students.
-
-    If there is already an n-minute break there, it is changed to an
-    n+5-minute break. Returns the number of minutes in the break.
+    if name.endswith("-minute break"):
+        minutes = name.split("-")[0]
+        if minutes.isdigit():
+            return Break(int(minutes))
+    return Student(name)
+
+
+def parse_names(lines: Iterable[str]) -> Iterator[str]:
+    """Yields each name in lines of text, such as a file's or the clipboard's.
+
+    Names can be separated by newlines or commas, and names that contain commas can
+    be quoted like in a CSV file. Blank names are skipped. The lines are read one at
+    a time, so a file does not need to be read into memory all at once.
+    """
+    for row in csv.reader(lines):
+        for name in row:
+            name = name.strip()
+            if name:
+                yield name
+
+
+def parse_roster(lines: Iterable[str], column: str | None = None) -> Iterator[str]:
+    """Yields each name in the lines of a file, such as a sign-up form's CSV export.
+
+    If the file's first row is a header with the word "name" in it, or if a column
+    is given, the file is read as a table and only one column's names are used: the
+    given column, which can be a header or a number starting from 1, or else the
+    first column whose header has the word "name". The header row is skipped.
+    Otherwise, the file is read like parse_names.
+
+    Raises
+    ------
+    ValueError
+        If the given column is not a header in the file or a number from 1 to the
+        number of columns in the first row.
     """
-    if names and names[-1].endswith("-minute break"):
-        minutes = int(names[-1].split("-")[0]) + 5
-        names[-1] = f"{minutes}-minute break"
+    rows = csv.reader(lines)
+    first = next(rows, None)
+    if first is None:
+        return
+    headers = [header.strip().casefold() for header in first]
+    name_columns = [i for i, h in enumerate(headers) if name_header_pattern.search(h)]
+    has_header = bool(name_columns)
+    if column is None:
+        if not has_header:
+            for row in chain([first], rows):
+                for name in row:
+                    name = name.strip()
+                    if name:
+                        yield name
+            return
+        index = name_columns[0]
+    elif column.isdigit() and 0 < int(column) <= len(first):
+        index = int(column) - 1
+    elif column.strip().casefold() in headers:
+        index = headers.index(column.strip().casefold())
+        has_header = True
     else:
-        names.append("5-minute break")
-        minutes = 5
-    return minutes
+        raise ValueError(f'there is no column "{column}"')
+    if not has_header:
+        rows = chain([first], rows)
+    for row in rows:
+        if index < len(row):
+            name = row[index].strip()
+            if name:
+                yield name
+
+
+class StudentQueue:
+    """A queue of students and breaks.
+
+    The first entry is the one currently meeting. Rotating the queue in either
+    direction takes constant time.
+
+    For each entry, the queue keeps running totals of how many students and how
+    many seconds of breaks there are from the front of the queue through that
+    entry. The totals are only updated when the queue changes, so the wait times
+    of everyone waiting can be found without walking the queue and adding up
+    their meetings again. The totals do not depend on the meeting duration, so
+    they stay valid when it changes.
+
+    The queue also keeps an index of its entries by name, in queue order, so it can
+    find the entry with a name without searching the queue. A sorted list of the
+    distinct names, compared case-insensitively, lets it find every name that
+    starts with some text by binary search.
+    """
 
+    def __init__(self, entries: Iterable[Student | Break] = ()):
+        self.__entries: deque[Student | Break] = deque(entries)
+        self.__totals: deque[tuple[int, int]] = deque()
+        self.__update_totals()
+        self.__by_name: dict[str, deque[Student | Break]] = {}
+        self.__sorted_names: list[tuple[str, str]] = []  # (casefolded, name) pairs
+        self.__index_names()
+        self.version = 0  # increases each time the queue changes
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> "StudentQueue":
+        """Creates a queue from names, such as those loaded from the database."""
+        return cls(parse_queue_entry(name) for name in names)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __iter__(self) -> Iterator[Student | Break]:
+        return iter(self.__entries)
+
+    def __getitem__(self, index: int) -> Student | Break:
+        return self.__entries[index]
+
+    def __contains__(self, name: str) -> bool:
+        """Returns whether an entry has the given name."""
+        return name in self.__by_name
+
+    def names(self) -> list[str]:
+        """Returns the names of all entries, with breaks named like "5-minute break"."""
+        return [entry.name for entry in self.__entries]
+
+    def append(self, entry: Student | Break) -> None:
+        students, break_seconds = self.__totals[-1] if self.__totals else (0, 0)
+        self.__entries.append(entry)
+        self.__totals.append(self.__add(students, break_seconds, entry))
+        self.__index(entry)
+        self.version += 1
+
+    def extend(self, entries: Iterable[Student | Break]) -> None:
+        for entry in entries:
+            self.append(entry)
+
+    def add_break(self, minutes: int) -> int:
+        """Adds a break to the end of the queue.
+
+        If there is already a break there, it is made longer instead. Returns the
+        number of minutes in the break.
+        """
+        if self.__entries and isinstance(self.__entries[-1], Break):
+            self.__unindex(self.__entries[-1], last=True)
+            self.__entries[-1].minutes += minutes
+            self.__index(self.__entries[-1])
+            students, break_seconds = self.__totals[-1]
+            self.__totals[-1] = (students, break_seconds + minutes * 60)
+            self.version += 1
+            return self.__entries[-1].minutes
+        self.append(Break(minutes))
+        return minutes
+
+    def pop(self) -> Student | Break:
+        """Removes and returns the last entry."""
+        self.__totals.pop()
+        self.version += 1
+        entry = self.__entries.pop()
+        self.__unindex(entry, last=True)
+        return entry
+
+    def find(self, name: str) -> int | None:
+        """Returns the index of the first entry with the given name, or None."""
+        same_name = self.__by_name.get(name)
+        if same_name is None:
+            return None
+        # Entries are only equal to themselves, so this is a fast scan in C.
+        return self.__entries.index(same_name[0])
+
+    def remove(self, name: str) -> int | None:
+        """Removes the first entry with the given name.
+
+        Returns the index the entry had, or None if there is no such entry.
+        """
+        i = self.find(name)
+        if i is not None:
+            self.delete(i)
+        return i
+
+    def insert(self, index: int, entry: Student | Break) -> None:
+        """Inserts an entry before an index."""
+        self.__entries.insert(index, entry)
+        self.__update_totals(index)
+        if entry.name in self.__by_name:
+            self.__by_name[entry.name] = deque(
+                other for other in self.__entries if other.name == entry.name
+            )
+        else:
+            self.__index(entry)
+        self.version += 1
+
+    def delete(self, index: int) -> Student | Break:
+        """Removes and returns the entry at an index."""
+        entry = self.__entries[index]
+        del self.__entries[index]
+        self.__update_totals(index)
+        same_name = self.__by_name[entry.name]
+        if same_name[0] is entry:
+            self.__unindex(entry, last=False)
+        else:
+            same_name.remove(entry)
+        self.version += 1
+        return entry
+
+    def suggest_names(self, text: str, limit: int = 10) -> list[str]:
+        """Returns names in the queue that match text, ignoring case.
+
+        Names that start with the text come first, in alphabetical order. If there
+        are fewer than limit of those, names that contain the text or its
+        characters in order follow.
+        """
+        folded = text.casefold()
+        start = bisect_left(self.__sorted_names, (folded,))
+        names = []
+        for folded_name, name in islice(self.__sorted_names, start, None):
+            if len(names) == limit or not folded_name.startswith(folded):
+                break
+            names.append(name)
+        if len(names) == limit or not folded:
+            return names
+        for folded_name, name in self.__sorted_names:
+            if folded_name.startswith(folded):
+                continue
+            if folded in folded_name or self.__is_subsequence(folded, folded_name):
+                names.append(name)
+                if len(names) == limit:
+                    break
+        return names
+
+    def rotate_forward(self) -> None:
+        """Moves the first entry to the end."""
+        if len(self.__entries) < 2:
+            return
+        entry = self.__entries.popleft()
+        self.__totals.popleft()
+        self.__entries.append(entry)
+        self.__totals.append(self.__add(*self.__totals[-1], entry))
+        same_name = self.__by_name[entry.name]
+        same_name.rotate(-1)  # the entry was the first with its name
+        self.version += 1
+
+    def rotate_backward(self) -> None:
+        """Moves the last entry to the front."""
+        if len(self.__entries) < 2:
+            return
+        entry = self.__entries.pop()
+        self.__totals.pop()
+        students, break_seconds = self.__totals[0]
+        first = self.__entries[0]
+        if isinstance(first, Break):
+            self.__totals.appendleft((students, break_seconds - first.seconds))
+        else:
+            self.__totals.appendleft((students - 1, break_seconds))
+        self.__entries.appendleft(entry)
+        self.__by_name[entry.name].rotate(1)  # the entry was the last with its name
+        self.version += 1
+
+    def shuffle(self, seed: int | None = None) -> None:
+        """Randomizes the order of the entries.
+
+        Shuffling the same number of entries with the same seed always moves them
+        the same way, so unshuffle can undo it.
+        """
+        entries = list(self.__entries)
+        self.__entries = deque(entries[i] for i in self.__get_shuffled_order(seed))
+        self.__update_totals()
+        self.__index_names()
+        self.version += 1
+
+    def unshuffle(self, seed: int) -> None:
+        """Undoes a shuffle with the given seed."""
+        entries = [None] * len(self.__entries)
+        for entry, i in zip(self.__entries, self.__get_shuffled_order(seed)):
+            entries[i] = entry
+        self.__entries = deque(entries)
+        self.__update_totals()
+        self.__index_names()
+        self.version += 1
+
+    def get_first_meeting_seconds(self, max_individual_seconds: int) -> int:
+        """Returns the full duration in seconds of the first entry's meeting."""
+        if self.__entries and isinstance(self.__entries[0], Break):
+            return self.__entries[0].seconds
+        return max_individual_seconds
+
+    def get_waiting(
+        self, index: int, meeting_seconds: int
+    ) -> tuple[Student | Break, int]:
+        """Returns a waiting entry and how long after the current meeting it starts.
+
+        Parameters
+        ----------
+        index : int
+            The index of the entry among those waiting, which excludes the first
+            entry of the queue.
+        meeting_seconds : int
+            The expected duration in seconds of each student's meeting.
+        """
+        first_students, first_break_seconds = self.__totals[0]
+        students, break_seconds = self.__totals[index]
+        return self.__entries[index + 1], (
+            (students - first_students) * meeting_seconds
+            + break_seconds
+            - first_break_seconds
+        )
 
-def get_help_text() -> str:
-    """Returns the help text."""
-    return dedent(
-        """\
-        <h3>keyboard shortcuts:</h3>
-        [b][#008000]h[/#008000][/b] — toggles this help message.
-        [b][#008000]@[/#008000][/b] — shows info about this app.
-        [b][#008000]+[/#008000][/b] — increases font size.
-        [b][#008000]-[/#008000][/b] — decreases font size.
-        [b][#008000]o[/#008000][/b] — opens the settings.
-        [b][#008000]a[/#008000][/b] — allows you to enter a student's name to add them to the queue.
-        [b][#008000]n[/#008000][/b] — brings the next student to the front of the queue, and rotates the previously front student to the end.
-        [b][#008000]z[/#008000][/b] — undoes the previous [#008000]n[/#008000] key press.
-        [b][#008000]![/#008000][/b] — removes the last student in the queue.
-        [b][#008000]?[/#008000][/b] — removes a student from the queue by name.
-        [b][#008000]b[/#008000][/b] — adds a 5 minute break to the end of the queue.
-        [b][#008000]$[/#008000][/b] — randomizes the order of the queue.
-        [b][#008000]m[/#008000][/b] — toggles the meeting mode between group and individual meetings.
-        [b][#008000]home[/#008000][/b] — changes the meeting mode to display a message saying tutoring hours will start soon.
-        [b][#008000]end[/#008000][/b] — changes the meeting mode to display a message saying tutoring hours will soon end.
-        [b][#008000]k[/#008000][/b] or [b][#008000]space[/#008000][/b] — pauses/unpauses the individual meetings timer.
-        [b][#008000]j[/#008000][/b] — adds 5 seconds to the individual meetings timer.
-        [b][#008000]l[/#008000][/b] — subtracts 5 seconds from the individual meetings timer.
-        [b][#008000]left arrow[/#008000][/b] — adds 30 seconds to the individual meetings timer.
-        [b][#008000]right arrow[/#008000][/b] — subtracts 30 seconds from the individual meetings timer.
-        [b][#008000]r[/#008000][/b] — resets the individual meetings timer.
-        [b][#008000]d[/#008000][/b] — allows you to change the individual meetings duration (in minutes).
-        [b][#008000]Ctrl/Cmd+w[/#008000][/b] — closes the app.
-        [b][#008000]F11[/#008000][/b] — toggles fullscreen.
-
-        For more tips and help, visit <a style="color: white" href="https://github.com/wheelercj/zq">zq's GitHub page</a>.
-        """  # noqa: E501
+    def iter_waiting(
+        self, meeting_seconds: int
+    ) -> Iterator[tuple[Student | Break, int]]:
+        """Yields each waiting entry and how long after the current meeting it starts.
+
+        Parameters
+        ----------
+        meeting_seconds : int
+            The expected duration in seconds of each student's meeting.
+        """
+        if len(self.__entries) < 2:
+            return
+        first_students, first_break_seconds = self.__totals[0]
+        entries = islice(self.__entries, 1, None)
+        totals = islice(self.__totals, len(self.__totals) - 1)
+        for entry, (students, break_seconds) in zip(entries, totals):
+            yield entry, (
+                (students - first_students) * meeting_seconds
+                + break_seconds
+                - first_break_seconds
+            )
+
+    @staticmethod
+    def __add(students: int, break_seconds: int, entry: Student | Break) -> tuple:
+        if isinstance(entry, Break):
+            return students, break_seconds + entry.seconds
+        return students + 1, break_seconds
+
+    def __index(self, entry: Student | Break) -> None:
+        """Adds an entry at the end of the queue to the name index."""
+        same_name = self.__by_name.get(entry.name)
+        if same_name is None:
+            self.__by_name[entry.name] = deque((entry,))
+            insort(self.__sorted_names, (entry.name.casefold(), entry.name))
+        else:
+            same_name.append(entry)
+
+    def __unindex(self, entry: Student | Break, last: bool) -> None:
+        """Removes an entry from the name index.
+
+        The entry must be either the last (if last is True) or the first entry with
+        its name.
+        """
+        same_name = self.__by_name[entry.name]
+        if last:
+            same_name.pop()
+        else:
+            same_name.popleft()
+        if not same_name:
+            del self.__by_name[entry.name]
+            key = (entry.name.casefold(), entry.name)
+            del self.__sorted_names[bisect_left(self.__sorted_names, key)]
+
+    def __get_shuffled_order(self, seed: int | None) -> list[int]:
+        """Returns the old index of each entry after a shuffle."""
+        order = list(range(len(self.__entries)))
+        random.Random(seed).shuffle(order)
+        return order
+
+    def __index_names(self) -> None:
+        """Rebuilds the name index from the entries."""
+        self.__by_name = {}
+        for entry in self.__entries:
+            self.__by_name.setdefault(entry.name, deque()).append(entry)
+        self.__sorted_names = sorted((name.casefold(), name) for name in self.__by_name)
+
+    @staticmethod
+    def __is_subsequence(text: str, name: str) -> bool:
+        """Returns whether the characters of text appear in name in order."""
+        characters = iter(name)
+        return all(character in characters for character in text)
+
+    def __update_totals(self, start: int = 0) -> None:
+        """Recalculates the running totals from the entry at the start index."""
+        while len(self.__totals) > start:
+            self.__totals.pop()
+        totals = self.__totals[-1] if self.__totals else (0, 0)
+        for entry in islice(self.__entries, start, None):
+            totals = self.__add(*totals, entry)
+            self.__totals.append(totals)
+
+
+class SessionState:
+    """The timers and mode of a session, saved so a restart can restore them."""
+
+    __slots__ = (
+        "mode",
+        "paused",
+        "individual_seconds",
+        "group_seconds",
+        "previous_individual_seconds",
+        "meeting_mean",
+        "meeting_variance",
+        "meeting_count",
+    )
+
+    def __init__(
+        self,
+        mode: Mode,
+        paused: bool,
+        individual_seconds: int,
+        group_seconds: int,
+        previous_individual_seconds: int | None,
+        meeting_mean: float = 0.0,
+        meeting_variance: float = 0.0,
+        meeting_count: int = 0,
+    ):
+        self.mode = mode
+        self.paused = paused
+        self.individual_seconds = individual_seconds
+        self.group_seconds = group_seconds
+        self.previous_individual_seconds = previous_individual_seconds
+        # The state of the session's MeetingEstimator.
+        self.meeting_mean = meeting_mean
+        self.meeting_variance = meeting_variance
+        self.meeting_count = meeting_count
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SessionState) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+
+class MeetingEstimator:
+    """Learns how long individual meetings actually take.
+
+    The mean and variance of the durations are exponentially weighted moving
+    averages, so recent meetings count the most and each update takes constant time
+    and memory.
+    """
+
+    ALPHA = 0.2  # how much each new meeting counts
+    MIN_COUNT = 3  # how many meetings to learn from before estimating
+
+    __slots__ = ("mean", "variance", "count")
+
+    def __init__(self, mean: float = 0.0, variance: float = 0.0, count: int = 0):
+        self.mean = mean
+        self.variance = variance
+        self.count = count
+
+    def add(self, seconds: float) -> None:
+        """Learns from the duration of a meeting that just ended."""
+        if not self.count:
+            self.mean = seconds
+            self.variance = 0.0
+        else:
+            difference = seconds - self.mean
+            increment = self.ALPHA * difference
+            self.mean += increment
+            self.variance = (1 - self.ALPHA) * (self.variance + difference * increment)
+        self.count += 1
+
+    def get_seconds(self, style: str, scheduled_seconds: int) -> int:
+        """Returns the expected duration of a meeting in seconds.
+
+        Parameters
+        ----------
+        style : str
+            "optimistic" for the average duration, "conservative" for one standard
+            deviation more than that, or "scheduled" for scheduled_seconds.
+        scheduled_seconds : int
+            The scheduled duration, which is also returned until enough meetings
+            have been learned from.
+        """
+        if self.count < self.MIN_COUNT or style not in ("optimistic", "conservative"):
+            return scheduled_seconds
+        if style == "optimistic":
+            return round(self.mean)
+        return round(self.mean + math.sqrt(self.variance))
+
+
+class Countdown:
+    """A countdown timer based on a deadline on the monotonic clock.
+
+    While the countdown is running, only its deadline is stored and the remaining
+    time is found from the current time, so late or missed ticks never add up to
+    an error. While it is stopped, the remaining time is stored instead.
+    """
+
+    __slots__ = ("__deadline", "__remaining")
+
+    def __init__(self, seconds: float = 0):
+        self.__deadline: float | None = None
+        self.__remaining = seconds
+
+    @property
+    def running(self) -> bool:
+        return self.__deadline is not None
+
+    def get_remaining(self, now: float | None = None) -> float:
+        """Returns the remaining time in seconds, which is never negative."""
+        if self.__deadline is None:
+            return self.__remaining
+        return max(self.__deadline - (monotonic() if now is None else now), 0)
+
+    def get_seconds(self, now: float | None = None) -> int:
+        """Returns the remaining time rounded up to whole seconds, as it is shown."""
+        return math.ceil(self.get_remaining(now))
+
+    def get_time_until_change(self, now: float | None = None) -> float:
+        """Returns how long until the shown number of seconds next changes."""
+        remaining = self.get_remaining(now)
+        return remaining - (math.ceil(remaining) - 1)
+
+    def set(self, seconds: float, now: float | None = None) -> None:
+        """Sets the remaining time without starting or stopping the countdown."""
+        seconds = max(seconds, 0)
+        if self.__deadline is None:
+            self.__remaining = seconds
+        else:
+            self.__deadline = (monotonic() if now is None else now) + seconds
+
+    def add(self, seconds: float, now: float | None = None) -> None:
+        """Adds to or, if seconds is negative, subtracts from the remaining time."""
+        self.set(self.get_remaining(now) + seconds, now)
+
+    def start(self, now: float | None = None) -> None:
+        if self.__deadline is None:
+            self.__deadline = (monotonic() if now is None else now) + self.__remaining
+
+    def stop(self, now: float | None = None) -> None:
+        if self.__deadline is not None:
+            self.__remaining = self.get_remaining(now)
+            self.__deadline = None
+
+
+class Stopwatch:
+    """A timer that counts up from when it was started on the monotonic clock."""
+
+    __slots__ = ("__start", "__elapsed")
+
+    def __init__(self, seconds: float = 0):
+        self.__start: float | None = None
+        self.__elapsed = seconds
+
+    @property
+    def running(self) -> bool:
+        return self.__start is not None
+
+    def get_elapsed(self, now: float | None = None) -> float:
+        if self.__start is None:
+            return self.__elapsed
+        return (monotonic() if now is None else now) - self.__start
+
+    def get_seconds(self, now: float | None = None) -> int:
+        """Returns the elapsed time rounded down to whole seconds, as it is shown."""
+        return math.floor(self.get_elapsed(now))
+
+    def get_time_until_change(self, now: float | None = None) -> float:
+        """Returns how long until the shown number of seconds next changes."""
+        elapsed = self.get_elapsed(now)
+        return math.floor(elapsed) + 1 - elapsed
+
+    def set(self, seconds: float, now: float | None = None) -> None:
+        """Sets the elapsed time without starting or stopping the stopwatch."""
+        if self.__start is None:
+            self.__elapsed = seconds
+        else:
+            self.__start = (monotonic() if now is None else now) - seconds
+
+    def start(self, now: float | None = None) -> None:
+        if self.__start is None:
+            self.__start = (monotonic() if now is None else now) - self.__elapsed
+
+    def stop(self, now: float | None = None) -> None:
+        if self.__start is not None:
+            self.__elapsed = self.get_elapsed(now)
+            self.__start = None
+
+
+def get_help_text(shortcuts: Iterable[tuple[list[str], str]]) -> str:
+    """Returns the help text.
+
+    Parameters
+    ----------
+    shortcuts : Iterable[tuple[list[str], str]]
+        The names of the keys bound to each command, and its description.
+    """
+    lines = (
+        " or ".join(f"[b][#008000]{html.escape(key)}[/#008000][/b]" for key in keys)
+        + f" — {description}\n"
+        for keys, description in shortcuts
+    )
+    return (
+        "<h3>keyboard shortcuts:</h3>\n"
+        + "".join(lines)
+        + dedent(
+            """
+            For more tips and help, visit <a style="color: white" href="https://github.com/wheelercj/zq">zq's GitHub page</a>.
+            """  # noqa: E501
+        )
     )
 
 
@@ -149,131 +723,64 @@ def get_about_text(VERSION: str) -> str:
     )
 
 
+def get_mode_names(meeting_minutes: int) -> list[str]:
+    """Returns the names of the meeting modes, indexed by their values."""
+    mode_names = [""] * len(Mode)
+    mode_names[Mode.GROUP.value] = "group meeting"
+    mode_names[Mode.INDIVIDUAL.value] = f"{meeting_minutes}-minute individual meetings"
+    mode_names[Mode.START.value] = "start"
+    mode_names[Mode.END.value] = "end"
+    return mode_names
+
+
 def get_timer_message(
     current_mode: Mode,
     mode_names: list[str],
-    student_names: list[str],
+    queue: StudentQueue,
     group_seconds: int,
     individual_seconds: int,
-    max_individual_seconds: int,
+    meeting_seconds: int,
+    include_waiting: bool = True,
 ) -> str:
-    """Creates the timer message."""
-    timer_message = f"[#8E8E8E]{mode_names[current_mode.value]}[/#8E8E8E]"
+    """Creates the timer message as HTML.
+
+    Names are escaped, so they always show as typed rather than as HTML. The wait
+    times assume each student's meeting takes meeting_seconds. If
+    include_waiting is False, the entries after the first are left out so that they
+    can be shown somewhere else.
+    """
+    parts = [
+        compile_Rich_style("[#8E8E8E]{}[/#8E8E8E]").format(
+            mode_names[current_mode.value]
+        )
+    ]
     if current_mode == Mode.GROUP:
-        timer_message += f"       [#8E8E8E]{format_time(group_seconds)}[/#8E8E8E]"
-    timer_message += "\n\n[u][b]meeting in progress with:[/b][/u]\n"
-    if current_mode == Mode.INDIVIDUAL and len(student_names) == 1:
-        timer_message += f"[#8E8E8E]{format_time(individual_seconds)}[/#8E8E8E] "
-    timer_message += f"{student_names[0]}"
-    if len(student_names) > 1:
+        parts.append(
+            compile_Rich_style("       [#8E8E8E]{}[/#8E8E8E]").format(
+                format_time(group_seconds)
+            )
+        )
+    parts.append(compile_Rich_style("\n\n[u][b]meeting in progress with:[/b][/u]\n"))
+    if current_mode == Mode.INDIVIDUAL and len(queue) == 1:
+        parts.append(
+            compile_Rich_style("[#8E8E8E]{}[/#8E8E8E] ").format(
+                format_time(individual_seconds)
+            )
+        )
+    parts.append(queue[0].html_name)
+    if len(queue) > 1:
         if current_mode == Mode.GROUP:
-            for i, name in enumerate(student_names[1:]):
-                timer_message += f"\n{name}"
+            if include_waiting:
+                parts.extend(f"\n{entry.html_name}" for entry in islice(queue, 1, None))
         elif current_mode == Mode.INDIVIDUAL:
-            timer_message += "\n\n[u][b]waiting:[/b][/u]\n"
-            next_seconds = individual_seconds
-            break_previously = False
-            for i, name in enumerate(student_names[1:]):
-                if i and not break_previously:
-                    next_seconds += max_individual_seconds
-                timer_message += (
-                    f"[#00ff00]{format_time(next_seconds)}[/#00ff00] {name}\n\n"
+            parts.append(compile_Rich_style("\n\n[u][b]waiting:[/b][/u]\n"))
+            if not include_waiting:
+                return "".join(parts)
+            waiting_line = compile_Rich_style("[#00ff00]{}[/#00ff00] {}\n\n")
+            parts.extend(
+                waiting_line.format(
+                    format_time(individual_seconds + seconds), entry.html_name
                 )
-                if name.endswith("-minute break"):
-                    next_seconds += int(name.split("-minute break")[0]) * 60
-                    break_previously = True
-                else:
-                    break_previously = False
-    return timer_message
-
-
-def go_to_next_student(
-    student_names: list[str], individual_seconds: int, max_individual_seconds: int
-) -> tuple[list[str], int, int]:
-    """Rotates the queue forwards.
-
-    Parameters
-    ----------
-    student_names : list[str]
-        The list of student names.
-    individual_seconds : int
-        The number of seconds remaining for the individual meeting.
-    max_individual_seconds : int
-        The maximum individual meeting duration in seconds.
-
-    Returns
-    -------
-    list[str]
-        The list of student names.
-    int
-        The number of seconds in the group meeting.
-    int
-        The number of seconds in the individual meeting.
-    """
-    student_names.append(student_names.pop(0))
-    previous_individual_seconds = individual_seconds
-    if student_names[0].endswith("-minute break"):
-        individual_seconds = int(student_names[0].split("-")[0]) * 60
-    else:
-        individual_seconds = max_individual_seconds
-    return student_names, individual_seconds, previous_individual_seconds
-
-
-def return_to_previous_meeting(
-    student_names: list[str], individual_seconds: int, previous_individual_seconds: int
-) -> tuple[list[str], int, int]:
-    """Rotates the queue backwards.
-
-    Parameters
-    ----------
-    student_names : list[str]
-        The list of students in the queue.
-    individual_seconds : int
-        The number of seconds remaining for the individual meeting.
-    previous_individual_seconds : int
-        The number of seconds remaining for the individual meeting before the last
-        meeting.
-
-    Returns
-    -------
-    list[str]
-        The list of students in the queue.
-    int
-        The individual meeting duration.
-    int
-        The individual meeting duration before the last student was removed.
-    """
-    individual_seconds, previous_individual_seconds = (
-        previous_individual_seconds,
-        individual_seconds,
-    )
-    student_names.insert(0, student_names.pop())
-    return student_names, individual_seconds, previous_individual_seconds
-
-
-def remove_last_student(
-    student_names: list[str], individual_seconds: int, max_individual_seconds: int
-) -> tuple[list[str], int]:
-    """Removes the last student from the queue and resets the timer if needed.
-
-    Parameters
-    ----------
-    student_names : list[str]
-        The list of students in the queue.
-    individual_seconds : int
-        The number of seconds remaining for the individual meeting.
-    max_individual_seconds : int
-        The maximum individual meeting duration in seconds.
-
-    Returns
-    -------
-    list[str]
-        The list of students in the queue.
-    int
-        The individual meeting duration.
-    """
-    if len(student_names):
-        student_names.pop()
-    if len(student_names) == 1:
-        individual_seconds = max_individual_seconds
-    return student_names, individual_seconds
+                for entry, seconds in queue.iter_waiting(meeting_seconds)
+            )
+    return "".join(parts)
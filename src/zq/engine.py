@@ -0,0 +1,695 @@
+import random
+from collections import deque
+from collections.abc import Callable
+from collections.abc import Iterable
+from time import monotonic
+
+try:
+    from common import (
+        Break,
+        Countdown,
+        MeetingEstimator,
+        Mode,
+        SessionState,
+        Stopwatch,
+        Student,
+        StudentQueue,
+    )
+except ImportError:
+    from .common import (
+        Break,
+        Countdown,
+        MeetingEstimator,
+        Mode,
+        SessionState,
+        Stopwatch,
+        Student,
+        StudentQueue,
+    )
+try:
+    from instrumentation import timed
+except ImportError:
+    from .instrumentation import timed
+
+
+class MemoryStorage:
+    """A stand-in for Storage that saves nothing.
+
+    Used when the engine is driven by tests, scripts, or simulations that should not
+    touch the database.
+    """
+
+    def load(self) -> tuple[StudentQueue, SessionState | None]:
+        return StudentQueue(), None
+
+    def close(self) -> None:
+        pass
+
+    def save_session(self, state: SessionState) -> None:
+        pass
+
+    def append(self, entry: Student | Break) -> None:
+        pass
+
+    def extend(self, entries: list[Student | Break]) -> None:
+        pass
+
+    def remove(self, index: int) -> None:
+        pass
+
+    def insert(self, index: int, entry: Student | Break) -> None:
+        pass
+
+    def remove_last(self, count: int = 1) -> None:
+        pass
+
+    def set_last_break_minutes(self, minutes: int) -> None:
+        pass
+
+    def rotate(self, forwards: bool) -> None:
+        pass
+
+    def save_all(self, queue: StudentQueue) -> None:
+        pass
+
+
+class Engine:
+    """The queue, meeting modes, and timers of a zq session, without any GUI.
+
+    Front-ends change the session only through this class's methods and subscribe to
+    be told when it changed. Each method that changes something returns True, or
+    False if it did nothing. Each change is saved to the storage as it happens.
+
+    Parameters
+    ----------
+    storage : Storage | MemoryStorage | None
+        Where to load the session from and save it to. If None, nothing is saved.
+    meeting_minutes : int
+        The duration of individual meetings in minutes.
+    transition_seconds : int
+        The time it takes to transition between meetings.
+    undo_depth : int
+        How many changes can be undone.
+    events : EventLog | None
+        Where to record what happens to the queue. If None, nothing is recorded.
+    wait_estimate : str
+        How to estimate the length of each waiting student's meeting when finding
+        wait times: "scheduled", "optimistic", or "conservative". See
+        MeetingEstimator.get_seconds.
+    """
+
+    def __init__(
+        self,
+        storage=None,
+        meeting_minutes: int = 20,
+        transition_seconds: int = 30,
+        undo_depth: int = 100,
+        events=None,
+        wait_estimate: str = "scheduled",
+    ):
+        self.storage = MemoryStorage() if storage is None else storage
+        self.events = events
+        self.__listeners: list[Callable[[], None]] = []
+        # Each change is recorded as the steps that reverse it, which hold only the
+        # entries and numbers those steps need, so old changes cost little memory
+        # and are forgotten once there are more than undo_depth.
+        self.__undo_log: deque[tuple[tuple, ...]] = deque(maxlen=undo_depth)
+        self.__redo_log: deque[tuple[tuple, ...]] = deque(maxlen=undo_depth)
+        self.countdown = Countdown()  # the individual meeting timer
+        self.stopwatch = Stopwatch()  # the group meeting timer
+        # How long the current individual meeting has actually been running.
+        self.meeting_stopwatch = Stopwatch()
+        self.estimator = MeetingEstimator()
+        self.wait_estimate = wait_estimate
+        self.__lowest_seconds = 0
+        self.max_individual_seconds = 0
+        self.min_empty_waitlist_seconds = 0
+        self.transition_seconds = 0
+        self.__set_meeting_length(meeting_minutes, transition_seconds)
+        self.queue, self.__saved_session = self.storage.load()
+        if self.__saved_session is None:
+            self.current_mode = Mode.GROUP
+            self.paused = True
+            self.individual_seconds = self.max_individual_seconds
+            self.group_seconds = 0
+            self.previous_individual_seconds = None
+        else:
+            self.current_mode = self.__saved_session.mode
+            self.paused = self.__saved_session.paused
+            self.individual_seconds = self.__saved_session.individual_seconds
+            self.group_seconds = self.__saved_session.group_seconds
+            self.previous_individual_seconds = (
+                self.__saved_session.previous_individual_seconds
+            )
+            self.estimator = MeetingEstimator(
+                self.__saved_session.meeting_mean,
+                self.__saved_session.meeting_variance,
+                self.__saved_session.meeting_count,
+            )
+        self.__ticked_seconds = (self.individual_seconds, self.group_seconds)
+        self.__front = self.queue[0] if self.queue else None
+        # the entry whose meeting the meeting stopwatch is timing
+        self.__timed_entry = self.__front
+        # the entry, elapsed seconds, and estimator before the last next_student
+        # call, so that previous_student can resume that meeting
+        self.__previous_meeting: tuple | None = None
+        self.update_timers()
+
+    @property
+    def individual_seconds(self) -> int:
+        """The remaining seconds of the individual meeting, as shown."""
+        return self.countdown.get_seconds()
+
+    @individual_seconds.setter
+    def individual_seconds(self, seconds: int) -> None:
+        self.countdown.set(seconds)
+
+    @property
+    def group_seconds(self) -> int:
+        """The elapsed seconds of the group meeting, as shown."""
+        return self.stopwatch.get_seconds()
+
+    @group_seconds.setter
+    def group_seconds(self, seconds: int) -> None:
+        self.stopwatch.set(seconds)
+
+    @property
+    def meeting_seconds(self) -> int:
+        """The expected duration of each waiting student's meeting, in seconds."""
+        return self.estimator.get_seconds(
+            self.wait_estimate, self.max_individual_seconds
+        )
+
+    def subscribe(self, listener: Callable[[], None]) -> None:
+        """Calls a function after each change to the session."""
+        self.__listeners.append(listener)
+
+    def close(self) -> None:
+        self.storage.close()
+        if self.events is not None:
+            self.events.close()
+
+    def append_name(self, name: str) -> bool:
+        return self.__do((self.__append, [Student(name)]))
+
+    def append_names(self, names: Iterable[str]) -> int:
+        """Adds students to the end of the queue, skipping names already in it.
+
+        The new students are saved in one transaction and the listeners are called
+        once. Returns the number of students added.
+        """
+        seen = set()
+        students = []
+        for name in names:
+            if name not in seen and name not in self.queue:
+                seen.add(name)
+                students.append(Student(name))
+        if not students:
+            return 0
+        self.__do((self.__append, students))
+        return len(students)
+
+    def remove_name(self, name: str) -> bool:
+        """Removes the first entry with the given name and resets the timer."""
+        steps = []
+        index = self.queue.find(name)
+        if index == 0:
+            steps.append((self.__end_meeting, False))
+        if index is not None:
+            steps.append((self.__delete, index))
+        if len(self.queue) > (index is not None):
+            steps.append((self.__restart_timer, False))
+        if not steps:
+            return False
+        return self.__do(*steps)
+
+    def remove_last(self) -> bool:
+        if not self.queue:
+            return False
+        steps = [(self.__pop, 1)]
+        if len(self.queue) == 2:
+            steps.append(
+                (
+                    self.__set_timer,
+                    self.max_individual_seconds,
+                    self.paused,
+                    self.previous_individual_seconds,
+                )
+            )
+        return self.__do(*steps)
+
+    def add_break(self) -> bool:
+        """Adds a 5-minute break to the end of the queue or lengthens the last one."""
+        if self.queue and isinstance(self.queue[-1], Break):
+            steps = [(self.__lengthen_last_break, 5)]
+            minutes = self.queue[-1].minutes + 5
+            count = len(self.queue)
+        else:
+            steps = [(self.__append, [Break(5)])]
+            minutes = 5
+            count = len(self.queue) + 1
+        if count == 1:
+            steps.append(
+                (
+                    self.__set_timer,
+                    minutes * 60,
+                    self.paused,
+                    self.previous_individual_seconds,
+                )
+            )
+        return self.__do(*steps)
+
+    def shuffle(self) -> bool:
+        """Randomizes the order of the queue."""
+        return self.__do((self.__shuffle, random.getrandbits(32)))
+
+    def next_student(self) -> bool:
+        """Rotates the queue forwards and starts the next meeting."""
+        if not self.queue:
+            return False
+        steps = [(self.__rotate, True), (self.__start_next_meeting,)]
+        if len(self.queue) > 1:
+            # rotating a single entry keeps its meeting going
+            steps.insert(0, (self.__end_meeting, True))
+        return self.__do(*steps)
+
+    def previous_student(self) -> bool:
+        """Undoes the last next_student call."""
+        if self.previous_individual_seconds is None or not self.queue:
+            return False
+        steps = [
+            (
+                self.__set_timer,
+                self.previous_individual_seconds,
+                self.paused,
+                self.individual_seconds,
+            ),
+            (self.__rotate, False),
+        ]
+        meeting = self.__previous_meeting
+        if meeting is not None and meeting[0] is self.queue[-1]:
+            # resume the previous meeting and forget what was learned from it
+            steps.append((self.__set_meeting, *meeting, None))
+        return self.__do(*steps)
+
+    def toggle_mode(self) -> bool:
+        """Switches between group and individual meetings."""
+        if self.current_mode == Mode.GROUP:
+            return self.__do((self.__set_mode, Mode.INDIVIDUAL))
+        return self.__do((self.__set_mode, Mode.GROUP, 0))
+
+    def set_mode(self, mode: Mode) -> bool:
+        if mode == self.current_mode:
+            return False
+        return self.__do((self.__set_mode, mode))
+
+    def toggle_pause(self) -> bool:
+        return self.__do((self.__set_paused, not self.paused))
+
+    def add_seconds(self, seconds: int) -> bool:
+        """Adds to or, if seconds is negative, subtracts from the current meeting.
+
+        Returns False if there is no time left to subtract.
+        """
+        if seconds < 0 and not self.countdown.get_remaining():
+            return False
+        return self.__do((self.__add_seconds, seconds))
+
+    def reset_timer(self) -> bool:
+        """Resets and pauses the individual meeting timer.
+
+        Returns False if the timer is already reset and paused.
+        """
+        if self.paused and self.countdown.get_remaining() == (
+            self.queue.get_first_meeting_seconds(self.max_individual_seconds)
+        ):
+            return False
+        return self.__do((self.__restart_timer, True))
+
+    def set_meeting_length(self, minutes: int, transition_seconds: int) -> bool:
+        """Changes the duration of individual meetings.
+
+        This is a change to the settings rather than the session, so it cannot be
+        undone.
+        """
+        self.__set_meeting_length(minutes, transition_seconds)
+        self.__changed()
+        return True
+
+    def undo(self) -> bool:
+        """Reverses the last change that has not been undone."""
+        if not self.__undo_log:
+            return False
+        self.__redo_log.append(self.__apply(self.__undo_log.pop()))
+        self.__changed()
+        return True
+
+    def redo(self) -> bool:
+        """Repeats the last change that was undone."""
+        if not self.__redo_log:
+            return False
+        self.__undo_log.append(self.__apply(self.__redo_log.pop()))
+        self.__changed()
+        return True
+
+    def set_undo_depth(self, depth: int) -> None:
+        """Changes how many changes can be undone, forgetting the oldest if needed."""
+        self.__undo_log = deque(self.__undo_log, maxlen=depth)
+        self.__redo_log = deque(self.__redo_log, maxlen=depth)
+
+    @timed("Engine.save_all")
+    def save_all(self) -> None:
+        """Saves the whole queue and the session.
+
+        Each change is already saved as it happens, so this is only needed when the
+        storage might be out of date.
+        """
+        self.storage.save_all(self.queue)
+        self.save_session()
+
+    def save_session(self) -> None:
+        """Saves the timers and mode if they changed since they were last saved."""
+        state = SessionState(
+            self.current_mode,
+            self.paused,
+            self.individual_seconds,
+            self.group_seconds,
+            self.previous_individual_seconds,
+            self.estimator.mean,
+            self.estimator.variance,
+            self.estimator.count,
+        )
+        if state != self.__saved_session:
+            self.storage.save_session(state)
+            self.__saved_session = state
+
+    def update_timers(self, now: float | None = None) -> None:
+        """Starts or stops the timers depending on the mode, queue, and pause."""
+        if now is None:
+            now = monotonic()
+        if (self.current_mode == Mode.INDIVIDUAL and len(self.queue) > 1) or (
+            len(self.queue) == 1 and isinstance(self.queue[0], Break)
+        ):
+            lowest_seconds = 0
+        else:
+            # With nobody waiting, the timer stops partway so that the meeting can
+            # continue without running out of time.
+            lowest_seconds = self.min_empty_waitlist_seconds
+        # The individual meeting timer is only shown in individual mode, so otherwise
+        # it only counts if it can still reach an alert, such as during a break.
+        if (
+            self.queue
+            and not self.paused
+            and self.countdown.get_remaining(now) > lowest_seconds
+            and (
+                self.current_mode == Mode.INDIVIDUAL
+                or lowest_seconds <= self.transition_seconds
+            )
+        ):
+            self.countdown.start(now)
+        elif self.countdown.running:
+            self.countdown.stop(now)
+            if (
+                lowest_seconds == self.__lowest_seconds
+                and self.countdown.get_remaining() < lowest_seconds
+            ):
+                # The countdown passed its lowest value between two ticks.
+                self.countdown.set(lowest_seconds)
+        self.__lowest_seconds = lowest_seconds
+        if self.current_mode == Mode.GROUP and self.queue:
+            self.stopwatch.start(now)
+        else:
+            self.stopwatch.stop(now)
+        if (
+            self.current_mode == Mode.INDIVIDUAL
+            and not self.paused
+            and self.queue
+            and isinstance(self.queue[0], Student)
+        ):
+            self.meeting_stopwatch.start(now)
+        else:
+            self.meeting_stopwatch.stop(now)
+
+    def get_time_until_change(self, now: float | None = None) -> float | None:
+        """Returns how long until a shown time next changes.
+
+        Returns None if no timer is counting.
+        """
+        delays = []
+        if self.countdown.running:
+            delays.append(self.countdown.get_time_until_change(now))
+        if self.stopwatch.running:
+            delays.append(self.stopwatch.get_time_until_change(now))
+        return min(delays, default=None)
+
+    @timed("Engine.tick")
+    def tick(self, now: float | None = None) -> str | None:
+        """Refreshes the timers, ideally when a shown time changes.
+
+        The remaining time is found from the timers' deadlines, so late or missed
+        ticks do not make the timers drift.
+
+        Returns
+        -------
+        str | None
+            "warning" if the individual meeting timer just reached the transition
+            time, "error" if it just ran out, or None.
+        """
+        counting_down = self.countdown.running
+        previous_seconds = self.__ticked_seconds
+        self.update_timers(now)
+        self.__ticked_seconds = (
+            self.countdown.get_seconds(now),
+            self.stopwatch.get_seconds(now),
+        )
+        if self.__ticked_seconds != previous_seconds:
+            self.save_session()
+            self.__notify()
+        if counting_down:
+            seconds = self.__ticked_seconds[0]
+            if previous_seconds[0] > self.transition_seconds >= seconds:
+                return "warning"
+            if previous_seconds[0] > 1 >= seconds:
+                return "error"
+        return None
+
+    def __set_meeting_length(self, minutes: int, transition_seconds: int) -> None:
+        self.max_individual_seconds = minutes * 60 + transition_seconds
+        self.min_empty_waitlist_seconds = minutes / 2 * 60
+        self.transition_seconds = transition_seconds
+
+    def __do(self, *steps: tuple) -> bool:
+        """Applies a change and records how to undo it."""
+        self.__undo_log.append(self.__apply(steps))
+        self.__redo_log.clear()
+        self.__changed()
+        return True
+
+    @staticmethod
+    def __apply(steps: tuple[tuple, ...]) -> tuple[tuple, ...]:
+        """Applies the steps of a change in order.
+
+        Each step is a method followed by its arguments, and each of those methods
+        returns the step that reverses it. Returns the steps that reverse the whole
+        change.
+        """
+        return tuple(method(*arguments) for method, *arguments in steps)[::-1]
+
+    def __end_meeting(self, remember: bool) -> tuple:
+        """Learns from the current meeting, which is ending, and resets its stopwatch.
+
+        Meetings shorter than the transition time are assumed to have been skipped,
+        such as when the student was away, and are not learned from. If remember is
+        True, the meeting is remembered so that previous_student can resume it and
+        forget what was learned from it.
+        """
+        meeting = (
+            self.__timed_entry,
+            self.meeting_stopwatch.get_elapsed(),
+            self.estimator.mean,
+            self.estimator.variance,
+            self.estimator.count,
+        )
+        undo = (self.__set_meeting, *meeting, self.__previous_meeting)
+        if meeting[1] >= max(self.transition_seconds, 1):
+            self.estimator.add(meeting[1])
+        self.meeting_stopwatch.stop()
+        self.meeting_stopwatch.set(0)
+        if remember:
+            self.__previous_meeting = meeting
+        return undo
+
+    def __set_meeting(
+        self,
+        entry: Student | Break | None,
+        elapsed: float,
+        mean: float,
+        variance: float,
+        count: int,
+        previous_meeting: tuple | None,
+    ) -> tuple:
+        """Sets how long an entry's meeting has run and what has been learned.
+
+        The meeting stopwatch keeps its time as long as the entry is at the front.
+        """
+        undo = (
+            self.__set_meeting,
+            self.__timed_entry,
+            self.meeting_stopwatch.get_elapsed(),
+            self.estimator.mean,
+            self.estimator.variance,
+            self.estimator.count,
+            self.__previous_meeting,
+        )
+        self.meeting_stopwatch.stop()
+        self.meeting_stopwatch.set(elapsed)
+        self.__timed_entry = entry
+        self.estimator = MeetingEstimator(mean, variance, count)
+        self.__previous_meeting = previous_meeting
+        return undo
+
+    def __append(self, entries: list[Student | Break]) -> tuple:
+        self.queue.extend(entries)
+        if len(entries) == 1:
+            self.storage.append(entries[0])
+        else:
+            self.storage.extend(entries)
+        for entry in entries:
+            self.__record_added(entry)
+        return self.__pop, len(entries)
+
+    def __pop(self, count: int) -> tuple:
+        entries = []
+        for _ in range(count):
+            entries.append(self.queue.pop())
+            self.__record("remove", name=entries[-1].name, index=len(self.queue))
+        entries.reverse()
+        self.storage.remove_last(count)
+        return self.__append, entries
+
+    def __insert(self, index: int, entry: Student | Break) -> tuple:
+        self.queue.insert(index, entry)
+        self.storage.insert(index, entry)
+        self.__record_added(entry)
+        return self.__delete, index
+
+    def __delete(self, index: int) -> tuple:
+        entry = self.queue.delete(index)
+        self.storage.remove(index)
+        self.__record("remove", name=entry.name, index=index)
+        return self.__insert, index, entry
+
+    def __lengthen_last_break(self, minutes: int) -> tuple:
+        total_minutes = self.queue.add_break(minutes)
+        self.storage.set_last_break_minutes(total_minutes)
+        self.__record("break", minutes=total_minutes)
+        return self.__lengthen_last_break, -minutes
+
+    def __shuffle(self, seed: int) -> tuple:
+        self.queue.shuffle(seed)
+        self.storage.save_all(self.queue)
+        self.__record("shuffle")
+        return self.__unshuffle, seed
+
+    def __unshuffle(self, seed: int) -> tuple:
+        self.queue.unshuffle(seed)
+        self.storage.save_all(self.queue)
+        self.__record("shuffle")
+        return self.__shuffle, seed
+
+    def __rotate(self, forwards: bool) -> tuple:
+        if forwards:
+            self.queue.rotate_forward()
+        else:
+            self.queue.rotate_backward()
+        self.storage.rotate(forwards)
+        self.__record("rotate", forwards=forwards)
+        return self.__rotate, not forwards
+
+    def __set_timer(
+        self,
+        individual_seconds: int,
+        paused: bool,
+        previous_individual_seconds: int | None,
+    ) -> tuple:
+        undo = (
+            self.__set_timer,
+            self.individual_seconds,
+            self.paused,
+            self.previous_individual_seconds,
+        )
+        # Stopping the countdown keeps update_timers from mistaking the new time
+        # for one the countdown reached by running, and it is restarted if needed.
+        self.countdown.stop()
+        self.individual_seconds = individual_seconds
+        self.paused = paused
+        self.previous_individual_seconds = previous_individual_seconds
+        return undo
+
+    def __restart_timer(self, pause: bool) -> tuple:
+        return self.__set_timer(
+            self.queue.get_first_meeting_seconds(self.max_individual_seconds),
+            pause or self.paused,
+            self.previous_individual_seconds,
+        )
+
+    def __start_next_meeting(self) -> tuple:
+        return self.__set_timer(
+            self.queue.get_first_meeting_seconds(self.max_individual_seconds),
+            self.paused,
+            self.individual_seconds,
+        )
+
+    def __set_paused(self, paused: bool) -> tuple:
+        self.paused = paused
+        return self.__set_paused, not paused
+
+    def __add_seconds(self, seconds: float) -> tuple:
+        # Less than the given seconds might be subtracted, so the undo step adds back
+        # only what was.
+        now = monotonic()
+        remaining = self.countdown.get_remaining(now)
+        self.countdown.add(seconds, now)
+        return self.__add_seconds, remaining - self.countdown.get_remaining(now)
+
+    def __set_mode(self, mode: Mode, group_seconds: int | None = None) -> tuple:
+        """Changes the mode and, unless group_seconds is None, the group timer."""
+        if group_seconds is None:
+            undo = (self.__set_mode, self.current_mode)
+        else:
+            undo = (self.__set_mode, self.current_mode, self.group_seconds)
+            self.group_seconds = group_seconds
+        self.current_mode = mode
+        self.__record("mode", mode=mode.name.lower())
+        return undo
+
+    def __record(self, event: str, **fields) -> None:
+        """Adds an event to the event log, if there is one, with the queue's length."""
+        if self.events is not None:
+            self.events.record(event, length=len(self.queue), **fields)
+
+    def __record_added(self, entry: Student | Break) -> None:
+        if isinstance(entry, Break):
+            self.__record("break", minutes=entry.minutes)
+        else:
+            self.__record("enqueue", name=entry.name)
+
+    def __changed(self) -> None:
+        front = self.queue[0] if self.queue else None
+        if front is not self.__timed_entry:
+            self.__timed_entry = front
+            self.meeting_stopwatch.stop()
+            self.meeting_stopwatch.set(0)
+        if front is not self.__front:
+            self.__front = front
+            if isinstance(front, Student):
+                self.__record("start meeting", name=front.name)
+            elif isinstance(front, Break):
+                self.__record("start break", minutes=front.minutes)
+        self.update_timers()
+        self.save_session()
+        self.__notify()
+
+    def __notify(self) -> None:
+        for listener in self.__listeners:
+            listener()
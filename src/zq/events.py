@@ -0,0 +1,219 @@
+"""An append-only log of what happens to the queue, and statistics about it.
+
+Each event is written as a line of JSON with the time it happened, so a log can be
+read back one line at a time no matter how large it grows.
+"""
+import argparse
+import json
+import threading
+from collections import Counter
+from collections import deque
+from collections.abc import Iterable
+from collections.abc import Iterator
+from datetime import datetime
+from time import time
+
+
+class EventLog:
+    """Appends events to a file from a background thread.
+
+    Recording an event only adds it to a buffer, so it never waits for the disk. The
+    buffer is written a short time after the first event recorded since the last
+    write, so events close together are written together.
+
+    Parameters
+    ----------
+    path : str
+        The log file, which is created if needed.
+    write_delay : float
+        How many seconds to wait after an event before writing.
+    """
+
+    def __init__(self, path: str = "events.jsonl", write_delay: float = 2.0):
+        self.path = path
+        self.write_delay = write_delay
+        self.__buffer: list[dict] = []
+        self.__lock = threading.Lock()  # guards the buffer and the write timer
+        self.__write_lock = threading.Lock()  # held while the file is written
+        self.__write_timer = None
+
+    def record(self, event: str, **fields) -> None:
+        """Adds an event to the log with the current time."""
+        with self.__lock:
+            self.__buffer.append({"time": time(), "event": event, **fields})
+            if self.__write_timer is None:
+                self.__write_timer = threading.Timer(self.write_delay, self.__write)
+                self.__write_timer.daemon = True
+                self.__write_timer.start()
+
+    def flush(self) -> None:
+        """Writes any buffered events now, such as before the app closes."""
+        with self.__lock:
+            write_timer = self.__write_timer
+        if write_timer is not None:
+            write_timer.cancel()
+            self.__write()
+        else:
+            with self.__write_lock:
+                pass  # waits for a write that already started
+
+    def close(self) -> None:
+        self.flush()
+
+    def __write(self) -> None:
+        with self.__write_lock:
+            with self.__lock:
+                self.__write_timer = None
+                events, self.__buffer = self.__buffer, []
+            if not events:
+                return
+            with open(self.path, "a", encoding="utf8") as file:
+                file.writelines(
+                    json.dumps({**event, "time": round(event["time"], 3)}) + "\n"
+                    for event in events
+                )
+
+
+def read_events(paths: Iterable[str]) -> Iterator[dict]:
+    """Yields the events in log files one at a time, skipping unreadable lines."""
+    for path in paths:
+        with open(path, "r", encoding="utf8") as file:
+            for line in file:
+                try:
+                    event = json.loads(line)
+                except json.decoder.JSONDecodeError:
+                    continue  # such as a line cut short by a crash
+                if isinstance(event, dict) and "time" in event and "event" in event:
+                    yield event
+
+
+class SessionStats:
+    """Statistics about events, found in one pass using little memory.
+
+    Only the students waiting right now are remembered, along with counts of wait
+    times by whole minute, so the memory used does not grow with the number of
+    events. The events must be in the order they happened.
+    """
+
+    def __init__(self):
+        self.event_count = 0
+        self.first_time = None
+        self.last_time = None
+        self.meeting_count = 0
+        self.active_hours = 0  # the number of clock hours with any events
+        self.max_hourly_meetings = 0
+        self.peak_length = 0
+        self.peak_length_time = None
+        self.wait_minutes: Counter[int] = Counter()
+        self.__waiting: dict[str, deque[float]] = {}  # when each student started
+        self.__front = None  # the name of the student meeting now
+        self.__hour = None
+        self.__hourly_meetings = 0
+
+    def add(self, event: dict) -> None:
+        t = event["time"]
+        self.event_count += 1
+        if self.first_time is None:
+            self.first_time = t
+        self.last_time = t
+        hour = int(t // 3600)
+        if hour != self.__hour:
+            self.__hour = hour
+            self.__hourly_meetings = 0
+            self.active_hours += 1
+        if event.get("length", 0) > self.peak_length:
+            self.peak_length = event["length"]
+            self.peak_length_time = t
+        kind = event["event"]
+        name = event.get("name")
+        if kind == "enqueue":
+            self.__waiting.setdefault(name, deque()).append(t)
+        elif kind == "remove":
+            if event.get("index") == 0:
+                self.__front = None
+            elif name in self.__waiting:
+                same_name = self.__waiting[name]
+                if event.get("index") == event.get("length"):
+                    same_name.pop()  # the last entry
+                else:
+                    same_name.popleft()
+                if not same_name:
+                    del self.__waiting[name]
+        elif kind in ("start meeting", "start break"):
+            if self.__front is not None:
+                # The student who was meeting is waiting again.
+                self.__waiting.setdefault(self.__front, deque()).append(t)
+            self.__front = None
+            if kind == "start meeting":
+                self.__front = name
+                self.meeting_count += 1
+                self.__hourly_meetings += 1
+                self.max_hourly_meetings = max(
+                    self.max_hourly_meetings, self.__hourly_meetings
+                )
+                same_name = self.__waiting.get(name)
+                if same_name:
+                    self.wait_minutes[int((t - same_name.popleft()) // 60)] += 1
+                    if not same_name:
+                        del self.__waiting[name]
+
+    def get_wait_percentile(self, fraction: float) -> int:
+        """Returns a percentile of the wait times in whole minutes, rounded down."""
+        target = fraction * sum(self.wait_minutes.values())
+        seen = 0
+        for minutes in sorted(self.wait_minutes):
+            seen += self.wait_minutes[minutes]
+            if seen >= target:
+                return minutes
+        return 0
+
+    def get_report(self) -> str:
+        if not self.event_count:
+            return "No events."
+        waits = sum(self.wait_minutes.values())
+        lines = [
+            f"events: {self.event_count} from {format_timestamp(self.first_time)}"
+            f" to {format_timestamp(self.last_time)}",
+            f"meetings: {self.meeting_count} in {self.active_hours} active hours"
+            f" ({self.meeting_count / self.active_hours:.1f} per hour, at most"
+            f" {self.max_hourly_meetings} in one hour)",
+        ]
+        if waits:
+            lines.append(
+                f"wait minutes: p50 {self.get_wait_percentile(0.5)},"
+                f" p90 {self.get_wait_percentile(0.9)},"
+                f" p99 {self.get_wait_percentile(0.99)},"
+                f" max {max(self.wait_minutes)} ({waits} waits)"
+            )
+        if self.peak_length_time is not None:
+            lines.append(
+                f"peak queue length: {self.peak_length}"
+                f" at {format_timestamp(self.peak_length_time)}"
+            )
+        return "\n".join(lines)
+
+
+def format_timestamp(t: float) -> str:
+    return datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M")
+
+
+def main(args: list[str]) -> None:
+    """Prints statistics from event logs, such as with `python -m zq stats`."""
+    parser = argparse.ArgumentParser(
+        prog="zq stats",
+        description="Show wait times, meetings per hour, and queue lengths.",
+    )
+    parser.add_argument(
+        "logs",
+        nargs="*",
+        default=["events.jsonl"],
+        help="the event logs to read, oldest first (default: events.jsonl)",
+    )
+    options = parser.parse_args(args)
+    stats = SessionStats()
+    try:
+        for event in read_events(options.logs):
+            stats.add(event)
+    except OSError as e:
+        parser.error(str(e))
+    print(stats.get_report())
@@ -0,0 +1,176 @@
+"""Optional latency histograms of the app's hot paths.
+
+Instrumentation is enabled by setting the ZQ_INSTRUMENT environment variable to 1
+before starting the app. When it is disabled, the timed decorator returns each
+function unchanged, so the instrumented functions run exactly as fast as before.
+Besides durations, tallies add up amounts such as how many pixels were repainted.
+The results are appended as JSON lines to the file named by the
+ZQ_INSTRUMENT_FILE environment variable, or instrumentation.jsonl by default,
+when the app closes.
+"""
+import json
+import os
+from collections.abc import Callable
+from functools import wraps
+from time import perf_counter
+from time import time
+
+
+ENABLED = os.environ.get("ZQ_INSTRUMENT", "") not in ("", "0")
+EXPORT_PATH = os.environ.get("ZQ_INSTRUMENT_FILE", "instrumentation.jsonl")
+
+
+class Histogram:
+    """Counts durations in buckets that double in size, using constant memory.
+
+    Bucket i counts durations of less than 2**i microseconds that do not fit in a
+    smaller bucket, so percentiles are accurate to within a factor of 2.
+    """
+
+    BUCKET_COUNT = 32  # the last bucket also counts anything over 35 minutes
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def add(self, seconds: float) -> None:
+        microseconds = max(int(seconds * 1_000_000), 0)
+        self.counts[min(microseconds.bit_length(), self.BUCKET_COUNT - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def get_percentile(self, fraction: float) -> float:
+        """Returns an upper bound of a percentile in seconds, such as 0.99 for p99."""
+        target = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and seen:
+                return min(2**i / 1_000_000, self.max)
+        return 0.0
+
+    def to_dict(self) -> dict:
+        """Returns the histogram's statistics in milliseconds."""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000,
+            "min_ms": self.min * 1000,
+            "p50_ms": self.get_percentile(0.5) * 1000,
+            "p90_ms": self.get_percentile(0.9) * 1000,
+            "p99_ms": self.get_percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+            "buckets_us": {
+                f"<{2**i}": count for i, count in enumerate(self.counts) if count
+            },
+        }
+
+
+class Tally:
+    """Counts how many times something happened and adds up an amount for each."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, amount: int) -> None:
+        self.count += 1
+        self.total += amount
+        self.max = max(self.max, amount)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0,
+            "max": self.max,
+        }
+
+
+histograms: dict[str, Histogram] = {}
+tallies: dict[str, Tally] = {}
+
+
+def record(name: str, seconds: float) -> None:
+    """Adds a duration to a histogram, creating the histogram if needed."""
+    histogram = histograms.get(name)
+    if histogram is None:
+        histogram = histograms[name] = Histogram()
+    histogram.add(seconds)
+
+
+def tally(name: str, amount: int) -> None:
+    """Adds an amount to a tally, creating the tally if needed."""
+    tally_ = tallies.get(name)
+    if tally_ is None:
+        tally_ = tallies[name] = Tally()
+    tally_.add(amount)
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """A decorator that records how long each call of a function takes.
+
+    If instrumentation is disabled, the function is returned unchanged.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        if not ENABLED:
+            return function
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def get_report() -> str:
+    """Returns tables of every histogram's and tally's statistics."""
+    if not ENABLED:
+        return (
+            "Instrumentation is disabled. Start zq with ZQ_INSTRUMENT=1 to enable it."
+        )
+    lines = [f"{'':<28}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+    for name, histogram in sorted(histograms.items()):
+        stats = histogram.to_dict()
+        lines.append(
+            f"{name:<28}{stats['count']:>8}{stats['p50_ms']:>10.3f}"
+            f"{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}"
+        )
+    if tallies:
+        lines.append(f"\n{'':<28}{'count':>8}{'mean':>10}{'max':>10}")
+        for name, tally_ in sorted(tallies.items()):
+            stats = tally_.to_dict()
+            lines.append(
+                f"{name:<28}{stats['count']:>8}{stats['mean']:>10.0f}"
+                f"{stats['max']:>10}"
+            )
+    return "\n".join(lines)
+
+
+def export(path: str = EXPORT_PATH) -> None:
+    """Appends each histogram's and tally's statistics to a file as JSON lines."""
+    if not histograms and not tallies:
+        return
+    timestamp = time()
+    with open(path, "a", encoding="utf8") as file:
+        for name, stats in sorted({**histograms, **tallies}.items()):
+            line = {"time": timestamp, "name": name, **stats.to_dict()}
+            file.write(json.dumps(line) + "\n")
@@ -0,0 +1,129 @@
+"""Keyboard shortcuts that can be changed in the settings.
+
+Each key is looked up in a dictionary of the commands bound to it, so handling a key
+takes the same time no matter how many shortcuts there are.
+"""
+import re
+from collections.abc import Callable
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QKeyEvent
+from PySide6.QtGui import QKeySequence
+
+
+# how some keys' names are shown in the help
+key_display_names = {
+    "left": "left arrow",
+    "right": "right arrow",
+    "up": "up arrow",
+    "down": "down arrow",
+}
+function_key_pattern = re.compile(r"f\d+")
+
+
+class Command:
+    """Something a key can do.
+
+    Calling a command calls its function with its arguments and returns whether
+    anything changed. The description is shown in the help after the command's keys,
+    such as "adds a 5-minute break to the end of the queue."
+    """
+
+    __slots__ = ("description", "function", "arguments")
+
+    def __init__(
+        self, description: str, function: Callable[..., bool | None], *arguments
+    ):
+        self.description = description
+        self.function = function
+        self.arguments = arguments
+
+    def __call__(self) -> bool:
+        return bool(self.function(*self.arguments))
+
+
+class Keymap:
+    """Which command each key runs.
+
+    Parameters
+    ----------
+    commands : dict[str, Command]
+        Every command that can be bound, by name.
+    bindings : dict[str, str]
+        The name of the command for each key's name, such as from the settings. Keys
+        bound to unknown commands are skipped with a warning.
+    """
+
+    def __init__(self, commands: dict[str, Command], bindings: dict[str, str]):
+        self.commands = commands
+        self.__bound: dict[str, Command] = {}
+        self.bind(bindings)
+
+    def bind(self, bindings: dict[str, str]) -> None:
+        """Replaces all the bindings."""
+        self.__bound = {}
+        for key, name in bindings.items():
+            if name in self.commands:
+                self.__bound[key] = self.commands[name]
+            else:
+                print(f'Unknown command "{name}" for the "{key}" key in the keymap.')
+
+    def get_shortcuts(self) -> list[tuple[list[str], str]]:
+        """Returns the keys bound to each command that has any, and its description.
+
+        The commands are in the same order as in the commands dictionary, and the keys
+        are named as they are shown to people.
+        """
+        keys: dict[Command, list[str]] = {}
+        for key, command in self.__bound.items():
+            keys.setdefault(command, []).append(format_key_name(key))
+        return [
+            (keys[command], command.description)
+            for command in self.commands.values()
+            if command in keys
+        ]
+
+    def dispatch(self, key: str) -> bool | None:
+        """Runs the command bound to a key.
+
+        Returns
+        -------
+        bool | None
+            Whether the command changed anything, or None if the key is not bound.
+        """
+        command = self.__bound.get(key)
+        if command is None:
+            return None
+        return command()
+
+
+def get_key_name(event: QKeyEvent) -> str:
+    """Returns the name a key press has in keymaps.
+
+    Keys that type a character without Ctrl/Cmd are named by that character, such as
+    "a", "A", or "?". Other keys are named like "space", "left", "f11", "ctrl+w", or
+    "ctrl+shift+z".
+    """
+    modifiers = event.modifiers()
+    ctrl = bool(modifiers & Qt.ControlModifier)
+    text = event.text()
+    if not ctrl and len(text) == 1 and text.isprintable() and not text.isspace():
+        return text
+    name = QKeySequence(event.key()).toString().lower()
+    if modifiers & Qt.ShiftModifier:
+        name = "shift+" + name
+    if ctrl:
+        name = "ctrl+" + name
+    return name
+
+
+def format_key_name(key: str) -> str:
+    """Returns how a key's name is shown to people, such as "Ctrl/Cmd+Shift+z"."""
+    shown = ""
+    for modifier, shown_modifier in (("ctrl+", "Ctrl/Cmd+"), ("shift+", "Shift+")):
+        if key.startswith(modifier) and len(key) > len(modifier):
+            shown += shown_modifier
+            key = key.removeprefix(modifier)
+    if function_key_pattern.fullmatch(key):
+        return shown + key.upper()
+    return shown + key_display_names.get(key, key)
@@ -1,7 +1,20 @@
+import re
+from collections.abc import Callable
+
 from PySide6.QtCore import Qt
 from PySide6.QtCore import Signal
 from PySide6.QtWidgets import QLineEdit
 
+try:
+    from keymap import get_key_name
+except ImportError:
+    from .keymap import get_key_name
+
+
+# Keys that edit text while a name or number is being typed.
+editing_keys = frozenset(("ctrl+a", "ctrl+c", "ctrl+v", "ctrl+x", "ctrl+y", "ctrl+z"))
+shortcut_while_typing_pattern = re.compile(r"ctrl\+[a-z]|f\d+")
+
 
 class MyLineEdit(QLineEdit):
     __receiving_new_name_input = False
@@ -11,75 +24,113 @@ class MyLineEdit(QLineEdit):
     return_new_name = Signal(str)
     return_existing_name = Signal(str)
     return_minutes = Signal(int)
-    char_key_pressed = Signal(str)
-    f11_key_pressed = Signal()
-    ctrl_w_pressed = Signal()
-    ctrl_c_pressed = Signal()
 
     def __init__(self):
         super().__init__()
-        self.__ctrl_pressed = False
+        # A function that runs the command bound to a key's name, and returns whether
+        # it changed anything or None if the key is not bound. While the line edit is
+        # hidden, every key is given to it.
+        self.handle_key: Callable[[str], bool | None] | None = None
+        # A function that returns names that match some text, used to complete
+        # names when removing a student.
+        self.suggest_names: Callable[[str], list[str]] | None = None
+        self.__typed = ""  # the text typed before cycling through suggestions
+        self.__suggestion_index = -1
+
+    def start_new_name_input(self) -> None:
+        self.__start_input()
+        self.__receiving_new_name_input = True
+
+    def start_existing_name_input(self) -> None:
+        self.__start_input()
+        self.__receiving_existing_name_input = True
+
+    def start_minutes_input(self) -> None:
+        self.__start_input()
+        self.__receiving_minutes_input = True
 
-    def keyReleaseEvent(self, event) -> None:
-        if event.key() == Qt.Key_Control:
-            self.__ctrl_pressed = False
+    def __start_input(self) -> None:
+        self.setText("")
+        self.show()
+        self.__suggestion_index = -1
+        self.__receiving_new_name_input = False
+        self.__receiving_existing_name_input = False
+        self.__receiving_minutes_input = False
 
     def keyPressEvent(self, event) -> None:
-        if event.key() == Qt.Key_Control:
-            self.__ctrl_pressed = True
-        elif event.key() == Qt.Key_F11:
-            self.f11_key_pressed.emit()
-        elif event.key() == Qt.Key_W and self.__ctrl_pressed:
-            self.ctrl_w_pressed.emit()
-        elif event.key() == Qt.Key_C and self.__ctrl_pressed:
-            if self.hasFocus():
-                self.copy()
+        if self.isHidden():
+            if self.handle_key is not None:
+                self.handle_key(get_key_name(event))
+        elif event.key() == Qt.Key_Escape:
+            self.hide()
+            self.setText("")
+        elif event.key() == Qt.Key_Return:
+            self.hide()
+            if self.__receiving_new_name_input:
+                self.__receiving_new_name_input = False
+                self.return_new_name.emit(self.text())
+            elif self.__receiving_existing_name_input:
+                self.__receiving_existing_name_input = False
+                self.return_existing_name.emit(self.text())
+            elif self.__receiving_minutes_input:
+                self.__receiving_minutes_input = False
+                try:
+                    self.return_minutes.emit(int(self.text()))
+                except ValueError:
+                    pass
+            self.setText("")
+        elif event.key() == Qt.Key_Backspace and self.text() == "":
+            self.hide()
+        elif event.key() in (Qt.Key_Down, Qt.Key_Up) and self.__can_suggest():
+            self.__cycle_suggestions(1 if event.key() == Qt.Key_Down else -1)
+        elif not self.__handle_shortcut(get_key_name(event)):
+            super().keyPressEvent(event)
+            self.__suggestion_index = -1
+            if (
+                self.__can_suggest()
+                and event.key() not in (Qt.Key_Backspace, Qt.Key_Delete)
+                and event.text().isprintable()
+                and event.text()
+            ):
+                self.__complete_inline()
+
+    def __handle_shortcut(self, key: str) -> bool:
+        """Runs the command bound to a key pressed while typing, if it has one.
+
+        Only function keys and Ctrl/Cmd+letter keys that do not edit text can be
+        shortcuts while typing. Returns whether the key was a shortcut.
+        """
+        if (
+            self.handle_key is None
+            or key in editing_keys
+            or not shortcut_while_typing_pattern.fullmatch(key)
+        ):
+            return False
+        return self.handle_key(key) is not None
+
+    def __can_suggest(self) -> bool:
+        return self.__receiving_existing_name_input and self.suggest_names is not None
+
+    def __complete_inline(self) -> None:
+        """Completes the name being typed, selecting the completed part.
+
+        Typing more replaces the selection, so the completion never gets in the way.
+        """
+        typed = self.text()
+        suggestions = self.suggest_names(typed)
+        if suggestions and suggestions[0].casefold().startswith(typed.casefold()):
+            self.setText(suggestions[0])
+            self.setSelection(len(typed), len(suggestions[0]) - len(typed))
+
+    def __cycle_suggestions(self, step: int) -> None:
+        """Replaces the text with the next or previous name that matches it."""
+        if self.__suggestion_index == -1:
+            if self.hasSelectedText():
+                self.__typed = self.text()[: self.selectionStart()]
             else:
-                self.ctrl_c_pressed.emit()
-        elif self.isHidden():
-            if event.text() in ("a", "?", "d"):
-                self.setText("")
-                self.show()
-                if event.text() == "a":
-                    self.__receiving_new_name_input = True
-                elif event.text() == "?":
-                    self.__receiving_existing_name_input = True
-                elif event.text() == "d":
-                    self.__receiving_minutes_input = True
-            elif len(event.text()) == 1:
-                self.char_key_pressed.emit(event.text())
-            elif event.key() == Qt.Key_Left:
-                self.char_key_pressed.emit("left")
-            elif event.key() == Qt.Key_Right:
-                self.char_key_pressed.emit("right")
-            elif event.key() == Qt.Key_Home:
-                self.char_key_pressed.emit("home")
-            elif event.key() == Qt.Key_End:
-                self.char_key_pressed.emit("end")
-        else:
-            if event.key() == Qt.Key_Escape:
-                self.hide()
-                self.setText("")
-            if event.key() == Qt.Key_Return:
-                self.hide()
-                if self.__receiving_new_name_input:
-                    self.__receiving_new_name_input = False
-                    self.return_new_name.emit(self.text())
-                elif self.__receiving_existing_name_input:
-                    self.__receiving_existing_name_input = False
-                    self.return_existing_name.emit(self.text())
-                elif self.__receiving_minutes_input:
-                    self.__receiving_minutes_input = False
-                    try:
-                        self.return_minutes.emit(int(self.text()))
-                    except ValueError:
-                        pass
-                self.setText("")
-            elif event.key() == Qt.Key_Backspace:
-                if self.text() == "":
-                    self.hide()
-                    self.setText("")
-                else:
-                    self.setText(self.text()[:-1])
-            elif len(event.text()) == 1 and event.key() != Qt.Key_Delete:
-                self.setText(self.text() + event.text())
+                self.__typed = self.text()
+        suggestions = self.suggest_names(self.__typed)
+        if not suggestions:
+            return
+        self.__suggestion_index = (self.__suggestion_index + step) % len(suggestions)
+        self.setText(suggestions[self.__suggestion_index])
@@ -0,0 +1,495 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import ipaddress
+import json
+import os
+import re
+import struct
+from collections.abc import Callable
+from time import monotonic
+from urllib.parse import urlsplit
+
+try:
+    from common import (
+        compile_Rich_style,
+        get_mode_names,
+        get_timer_message,
+        Mode,
+        parse_names,
+    )
+except ImportError:
+    from .common import (
+        compile_Rich_style,
+        get_mode_names,
+        get_timer_message,
+        Mode,
+        parse_names,
+    )
+try:
+    from engine import Engine
+except ImportError:
+    from .engine import Engine
+try:
+    from events import EventLog
+except ImportError:
+    from .events import EventLog
+try:
+    from settings import SettingsStore
+except ImportError:
+    from .settings import SettingsStore
+try:
+    from storage import Storage
+except ImportError:
+    from .storage import Storage
+
+
+QUEUE_NAME_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+TEXT = 0x1
+CLOSE = 0x8
+PING = 0x9
+PONG = 0xA
+VIEWER_PAGE = """\
+<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>zq: {name}</title>
+<style>
+body {{
+    display: flex;
+    gap: 4em;
+    margin: 2em;
+    color: white;
+    background-color: rgb(30, 30, 30);
+    font: 22px "DejaVu Sans Mono", monospace;
+    white-space: pre-wrap;
+}}
+div {{ flex: 1; }}
+</style>
+</head>
+<body>
+<div id="welcome"></div>
+<div id="timer"></div>
+<script>
+function connect() {{
+    const socket = new WebSocket(`ws://${{location.host}}/ws/{name}`);
+    socket.onmessage = (event) => {{
+        const state = JSON.parse(event.data);
+        if (state.html !== undefined) {{
+            document.getElementById("welcome").innerHTML = state.welcome;
+            document.getElementById("timer").innerHTML = state.html;
+        }}
+    }};
+    socket.onclose = () => setTimeout(connect, 1000);
+}}
+connect();
+</script>
+</body>
+</html>
+"""
+
+
+class QueueHost:
+    """One queue hosted by the server, with its own settings and database.
+
+    Parameters
+    ----------
+    name : str
+        The queue's name, which is also the name of its folder.
+    directory : str
+        The folder with the queue's settings.json and students.db files.
+    """
+
+    def __init__(self, name: str, directory: str):
+        self.name = name
+        self.settings = SettingsStore(os.path.join(directory, "settings.json"))
+        self.settings.load()
+        self.mode_names = get_mode_names(self.settings["meeting minutes"])
+        self.engine = Engine(
+            Storage(os.path.join(directory, "students.db")),
+            self.settings["meeting minutes"],
+            self.settings["transition seconds"],
+            self.settings["undo depth"],
+            EventLog(os.path.join(directory, "events.jsonl")),
+            self.settings["wait estimate"],
+        )
+        self.engine.subscribe(self.__changed)
+        self.settings.subscribe(
+            ("meeting minutes", "transition seconds"), self.__update_meeting_length
+        )
+        self.settings.subscribe(("wait estimate",), self.__update_wait_estimate)
+        self.settings.subscribe(
+            ("undo depth",),
+            lambda: self.engine.set_undo_depth(self.settings["undo depth"]),
+        )
+        self.clients: set[asyncio.StreamWriter] = set()
+        self.__broadcast_pending = False
+        self.__commands: dict[str, Callable[[str], bool]] = {
+            "add": self.__add,
+            "import": lambda names: bool(
+                self.engine.append_names(parse_names(names.splitlines()))
+            ),
+            "remove": self.engine.remove_name,
+            "next": lambda _: self.engine.next_student(),
+            "previous": lambda _: self.engine.previous_student(),
+            "remove-last": lambda _: self.engine.remove_last(),
+            "break": lambda _: self.engine.add_break(),
+            "shuffle": lambda _: self.engine.shuffle(),
+            "mode": lambda _: self.engine.toggle_mode(),
+            "start": lambda _: self.engine.set_mode(Mode.START),
+            "end": lambda _: self.engine.set_mode(Mode.END),
+            "pause": lambda _: self.engine.toggle_pause(),
+            "add-seconds": lambda seconds: self.engine.add_seconds(int(seconds)),
+            "reset": lambda _: self.engine.reset_timer(),
+            "minutes": self.__set_minutes,
+            "undo": lambda _: self.engine.undo(),
+            "redo": lambda _: self.engine.redo(),
+        }
+
+    def close(self) -> None:
+        self.engine.close()
+        self.settings.flush()
+
+    def run(self, command: str, argument: str) -> bool:
+        """Runs a command on the queue.
+
+        Raises
+        ------
+        KeyError
+            If the command does not exist.
+        ValueError
+            If the command's argument is invalid.
+        """
+        return self.__commands[command](argument)
+
+    def get_state(self) -> dict:
+        """Returns the queue's state in a form that can be converted to JSON."""
+        engine = self.engine
+        if engine.current_mode == Mode.START:
+            html = compile_Rich_style(self.settings["starting message"])
+        elif engine.current_mode == Mode.END:
+            html = compile_Rich_style(self.settings["ending message"])
+        elif not engine.queue:
+            html = compile_Rich_style("[#8E8E8E](no students in queue)[/#8E8E8E]")
+        else:
+            html = get_timer_message(
+                engine.current_mode,
+                self.mode_names,
+                engine.queue,
+                engine.group_seconds,
+                engine.individual_seconds,
+                engine.meeting_seconds,
+            )
+        return {
+            "queue": self.name,
+            "mode": engine.current_mode.name.lower(),
+            "paused": engine.paused,
+            "individual_seconds": engine.individual_seconds,
+            "group_seconds": engine.group_seconds,
+            "meeting_seconds": engine.meeting_seconds,
+            "names": engine.queue.names(),
+            "welcome": compile_Rich_style(self.settings["welcome message"]),
+            "html": html,
+        }
+
+    def send(self, message: dict) -> None:
+        """Sends a message to every viewer of the queue."""
+        frame = encode_frame(TEXT, json.dumps(message).encode())
+        for writer in list(self.clients):
+            if writer.is_closing():
+                self.clients.discard(writer)
+            else:
+                writer.write(frame)
+
+    def __add(self, name: str) -> bool:
+        name = name.strip()
+        if not name:
+            raise ValueError("a name is required")
+        return self.engine.append_name(name)
+
+    def __set_minutes(self, minutes: str) -> bool:
+        if not minutes.isdigit() or int(minutes) <= 0:
+            raise ValueError("the minutes must be a positive whole number")
+        return bool(self.settings.update({"meeting minutes": int(minutes)}))
+
+    def __update_meeting_length(self) -> None:
+        self.mode_names = get_mode_names(self.settings["meeting minutes"])
+        self.engine.set_meeting_length(
+            self.settings["meeting minutes"], self.settings["transition seconds"]
+        )
+
+    def __update_wait_estimate(self) -> None:
+        self.engine.wait_estimate = self.settings["wait estimate"]
+        self.__changed()
+
+    def __changed(self) -> None:
+        """Sends the state to the viewers once control returns to the event loop.
+
+        Any number of changes in the same event loop turn cause only one message.
+        """
+        if self.clients and not self.__broadcast_pending:
+            self.__broadcast_pending = True
+            asyncio.get_running_loop().call_soon(self.__broadcast)
+
+    def __broadcast(self) -> None:
+        self.__broadcast_pending = False
+        self.send(self.get_state())
+
+
+class Server:
+    """Hosts many queues in one process and serves them over HTTP and WebSocket.
+
+    One task ticks every queue. It sleeps until the soonest time that any queue's
+    shown time changes, or until a command changes a queue, instead of each queue
+    having its own timer.
+
+    Routes:
+
+    * GET / lists the queues.
+    * GET /<queue> is a page that shows the queue live.
+    * GET /api/<queue> returns the queue's state as JSON.
+    * POST /api/<queue>/<command> runs a command, with its argument (if any) as the
+      request body, and returns the queue's new state.
+    * GET /ws/<queue> is a WebSocket that sends the queue's state each time it
+      changes, and {"alert": "warning"} or {"alert": "error"} when the meeting
+      timer reaches the transition time or runs out.
+
+    Browsers let any page send requests and open WebSockets to any server, but they
+    say which site the page is from in the Origin header. Requests from pages on
+    other sites, and requests whose Host header names another site, are refused.
+    """
+
+    def __init__(self, hosts: dict[str, QueueHost]):
+        self.hosts = hosts
+        self.__wake = asyncio.Event()
+        self.__host = "127.0.0.1"
+        self.__port = 8000
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+        self.__host = host
+        self.__port = port
+        server = await asyncio.start_server(self.__handle, host, port)
+        print(f"Serving {len(self.hosts)} queue(s) at http://{host}:{port}/")
+        try:
+            async with server:
+                await asyncio.gather(server.serve_forever(), self.__tick_forever())
+        finally:
+            for queue_host in self.hosts.values():
+                queue_host.close()
+
+    async def __tick_forever(self) -> None:
+        while True:
+            now = monotonic()
+            delays = (
+                queue_host.engine.get_time_until_change(now)
+                for queue_host in self.hosts.values()
+            )
+            timeout = min((d for d in delays if d is not None), default=None)
+            self.__wake.clear()
+            try:
+                await asyncio.wait_for(self.__wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            now = monotonic()
+            for queue_host in self.hosts.values():
+                alert = queue_host.engine.tick(now)
+                if alert is not None:
+                    queue_host.send({"alert": alert})
+
+    async def __handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = await reader.readline()
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            parts = target.split("?", 1)[0].strip("/").split("/")
+            origin = headers.get("origin")
+            if not self.__is_own_host(headers.get("host", "")) or (
+                origin is not None and not self.__is_own_host(urlsplit(origin).netloc)
+            ):
+                status, content_type, content = (
+                    "403 Forbidden",
+                    "text/plain",
+                    b"requests from other sites are not allowed",
+                )
+            elif parts[0] == "ws" and len(parts) == 2 and parts[1] in self.hosts:
+                await self.__serve_websocket(
+                    self.hosts[parts[1]], headers, reader, writer
+                )
+                return
+            else:
+                status, content_type, content = self.__route(method, parts, body)
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(content)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1") + content
+            )
+            await writer.drain()
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def __is_own_host(self, netloc: str) -> bool:
+        """Returns whether a Host header or an origin's host names this server.
+
+        Only the address the server listens on, localhost, and IP addresses count,
+        so that pages on other sites, including sites whose domain names were
+        pointed at this computer, cannot use the server.
+        """
+        try:
+            url = urlsplit(f"//{netloc}")
+            port = url.port or 80
+        except ValueError:
+            return False
+        if port != self.__port or url.hostname is None:
+            return False
+        if url.hostname in (self.__host.lower(), "localhost"):
+            return True
+        try:
+            ipaddress.ip_address(url.hostname)
+        except ValueError:
+            return False
+        return True
+
+    def __route(self, method: str, parts: list[str], body: bytes) -> tuple:
+        """Returns the status, content type, and content of an HTTP response."""
+        if method == "GET" and parts == [""]:
+            return "200 OK", "application/json", json.dumps(list(self.hosts)).encode()
+        if method == "GET" and len(parts) == 1 and parts[0] in self.hosts:
+            page = VIEWER_PAGE.format(name=parts[0])
+            return "200 OK", "text/html; charset=utf-8", page.encode()
+        if parts[0] != "api" or len(parts) < 2 or parts[1] not in self.hosts:
+            return "404 Not Found", "text/plain", b"no such queue"
+        queue_host = self.hosts[parts[1]]
+        if method == "POST" and len(parts) == 3:
+            try:
+                queue_host.run(parts[2], body.decode())
+            except KeyError:
+                return "404 Not Found", "text/plain", b"no such command"
+            except ValueError as e:
+                return "400 Bad Request", "text/plain", str(e).encode()
+            self.__wake.set()
+        elif method != "GET" or len(parts) != 2:
+            return "405 Method Not Allowed", "text/plain", b""
+        return "200 OK", "application/json", json.dumps(queue_host.get_state()).encode()
+
+    async def __serve_websocket(
+        self,
+        queue_host: QueueHost,
+        headers: dict[str, str],
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(
+            hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()
+        ).decode()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("latin-1")
+        )
+        writer.write(encode_frame(TEXT, json.dumps(queue_host.get_state()).encode()))
+        queue_host.clients.add(writer)
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == CLOSE:
+                    writer.write(encode_frame(CLOSE, payload[:2]))
+                    await writer.drain()
+                    return
+                if opcode == PING:
+                    writer.write(encode_frame(PONG, payload))
+                await writer.drain()
+        finally:
+            queue_host.clients.discard(writer)
+
+
+def encode_frame(opcode: int, payload: bytes) -> bytes:
+    """Creates an unfragmented, unmasked WebSocket frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """Reads a WebSocket frame and returns its opcode and unmasked payload."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask is not None:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return first & 0x0F, payload
+
+
+def is_queue_folder(path: str) -> bool:
+    """Returns whether a folder has a queue's files, so other folders are not used."""
+    return any(
+        os.path.isfile(os.path.join(path, name))
+        for name in ("settings.json", "students.db")
+    )
+
+
+def main(args: list[str]) -> None:
+    """Runs the server from the command line, such as with `python -m zq serve`."""
+    parser = argparse.ArgumentParser(
+        prog="zq serve",
+        description=(
+            "Host many queues in one process. Each queue has its own folder with its"
+            " own settings.json and students.db files."
+        ),
+    )
+    parser.add_argument(
+        "queues",
+        nargs="*",
+        help="the names of the queues to host, whose folders are created if needed"
+        " (default: every folder in the directory that has a settings.json or"
+        " students.db file)",
+    )
+    parser.add_argument(
+        "--dir", default=".", help="the directory with the queues' folders"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    options = parser.parse_args(args)
+    names = options.queues or sorted(
+        entry.name
+        for entry in os.scandir(options.dir)
+        if entry.is_dir()
+        and QUEUE_NAME_PATTERN.fullmatch(entry.name)
+        and is_queue_folder(entry.path)
+    )
+    hosts = {}
+    for name in names:
+        if not QUEUE_NAME_PATTERN.fullmatch(name):
+            parser.error(f"invalid queue name: {name!r}")
+        directory = os.path.join(options.dir, name)
+        os.makedirs(directory, exist_ok=True)
+        hosts[name] = QueueHost(name, directory)
+    if not hosts:
+        parser.error("no queues to host; give the names of the queues to create them")
+    try:
+        asyncio.run(Server(hosts).serve(options.host, options.port))
+    except KeyboardInterrupt:
+        pass
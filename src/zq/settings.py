@@ -1,15 +1,15 @@
 import json
+import os
+import tempfile
+import threading
+from collections.abc import Callable
+from collections.abc import Iterable
 from textwrap import dedent
 
-from PySide6.QtGui import QFont
-from PySide6.QtWidgets import QDialog
-from PySide6.QtWidgets import QDialogButtonBox
-from PySide6.QtWidgets import QFontDialog
-from PySide6.QtWidgets import QLabel
-from PySide6.QtWidgets import QLineEdit
-from PySide6.QtWidgets import QPushButton
-from PySide6.QtWidgets import QTextEdit
-from PySide6.QtWidgets import QVBoxLayout
+try:
+    from common import compile_Rich_style
+except ImportError:
+    from .common import compile_Rich_style
 
 
 def format_setting_string(message: str) -> str:
@@ -22,6 +22,58 @@ __DEFAULT_SETTINGS = {
     "font size": 22,
     "meeting minutes": 20,
     "transition seconds": 30,  # The time it takes to transition between meetings.
+    # Whether to show everyone waiting in a list that only draws the visible rows,
+    # which is faster for very large queues.
+    "virtualized waitlist": False,
+    "undo depth": 100,  # How many changes Ctrl/Cmd+z can undo.
+    # How long to expect each waiting student's meeting to take when showing wait
+    # times: "scheduled" for the meeting duration, or "optimistic" or
+    # "conservative" for an estimate learned from recent meetings.
+    "wait estimate": "conservative",
+    # Whether to repaint only the characters of the timer message that changed, so
+    # that screen sharing sends as little of the window as possible each second.
+    "minimal repaints": True,
+    # The command each key runs. Keys that type a character are named by it, and
+    # others are named like "space", "left", "f11", or "ctrl+shift+z".
+    "keymap": {
+        "h": "toggle help",
+        "@": "toggle about",
+        "o": "open settings",
+        "=": "increase font size",
+        "+": "increase font size",
+        "-": "decrease font size",
+        "_": "decrease font size",
+        "a": "add student",
+        "?": "remove student",
+        "d": "change meeting minutes",
+        "n": "next student",
+        "z": "previous student",
+        "!": "remove last",
+        "b": "add break",
+        "$": "shuffle",
+        "m": "toggle mode",
+        "home": "start mode",
+        "end": "end mode",
+        "k": "toggle pause",
+        "space": "toggle pause",
+        "j": "add 5 seconds",
+        "l": "subtract 5 seconds",
+        "left": "add 30 seconds",
+        "right": "subtract 30 seconds",
+        "r": "reset timer",
+        "s": "save",
+        "ctrl+v": "paste names",
+        "ctrl+z": "undo",
+        "ctrl+y": "redo",
+        "ctrl+shift+z": "redo",
+        "ctrl+c": "copy",
+        "f11": "toggle fullscreen",
+        "f12": "toggle statistics",
+        "ctrl+w": "close",
+    },
+    # The name of one of chime's sound themes or the path to a folder that has
+    # warning.wav and error.wav files.
+    "sound theme": "material",
     "welcome message": format_setting_string(
         """\
         Welcome to the LAVC computer science tutoring! My name is Chris Wheeler, and I
@@ -48,107 +100,132 @@ __DEFAULT_SETTINGS = {
 }
 
 
-settings = {}
+class SettingsStore:
+    """Settings that save themselves in the background and notify subscribers.
 
+    Changing a setting only changes it in memory and schedules a save. The file is
+    written by a background thread after a short delay, so several changes close
+    together cause only one write. Each write goes to a temporary file that then
+    replaces the settings file, so the file is never left partly written.
 
-def save_settings() -> None:
-    with open("settings.json", "w", encoding="utf8") as file:
-        json.dump(settings, file)
+    Parameters
+    ----------
+    path : str
+        The settings file.
+    save_delay : float
+        How many seconds to wait after a change before saving.
+    """
+
+    def __init__(self, path: str = "settings.json", save_delay: float = 0.5):
+        self.path = path
+        self.save_delay = save_delay
+        self.__values = {}
+        self.__subscribers: list[tuple[frozenset[str], Callable[[], None]]] = []
+        self.__lock = threading.Lock()  # guards the values and the save timer
+        self.__write_lock = threading.Lock()  # held while the file is written
+        self.__save_timer = None
+
+    def load(self) -> None:
+        """Loads the settings file, or the default settings if it cannot be read."""
+        self.__values = read_settings(self.path)
+
+    def __getitem__(self, key: str):
+        return self.__values[key]
 
+    def __setitem__(self, key: str, value) -> None:
+        self.update({key: value})
 
-def load_settings() -> None:
-    """Load settings from the settings.json file.
+    def __contains__(self, key: str) -> bool:
+        return key in self.__values
 
-    If the file does not exist or cannot be parsed, the default settings are used.
+    def update(self, changes: dict) -> set[str]:
+        """Changes settings, notifies subscribers, and schedules a save.
+
+        Only subscribers to the keys whose values actually changed are notified,
+        and each is notified once no matter how many of its keys changed.
+
+        Returns
+        -------
+        set[str]
+            The keys whose values changed.
+        """
+        with self.__lock:
+            changed = {
+                key
+                for key, value in changes.items()
+                if key not in self.__values or self.__values[key] != value
+            }
+            for key in changed:
+                self.__values[key] = changes[key]
+            if changed and self.__save_timer is None:
+                self.__save_timer = threading.Timer(self.save_delay, self.__save)
+                self.__save_timer.daemon = True
+                self.__save_timer.start()
+        for keys, callback in self.__subscribers:
+            if keys & changed:
+                callback()
+        return changed
+
+    def subscribe(self, keys: Iterable[str], callback: Callable[[], None]) -> None:
+        """Calls a function each time any of the given settings change."""
+        self.__subscribers.append((frozenset(keys), callback))
+
+    def flush(self) -> None:
+        """Saves any unsaved changes now, such as before the app closes."""
+        with self.__lock:
+            save_timer = self.__save_timer
+        if save_timer is not None:
+            save_timer.cancel()
+            self.__save()
+        else:
+            with self.__write_lock:
+                pass  # waits for a save that already started
+
+    def __save(self) -> None:
+        with self.__write_lock:
+            with self.__lock:
+                self.__save_timer = None
+                values = dict(self.__values)
+            write_settings(values, self.path)
+
+
+settings = SettingsStore()
+settings.subscribe(
+    ("welcome message", "starting message", "ending message"),
+    compile_Rich_style.cache_clear,
+)
+
+
+def write_settings(values: dict, path: str = "settings.json") -> None:
+    """Writes settings to a temporary file that then replaces the settings file."""
+    folder = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf8", dir=folder, suffix=".tmp", delete=False
+    ) as file:
+        json.dump(values, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(file.name, path)
+
+
+def read_settings(path: str = "settings.json") -> dict:
+    """Reads settings from a file and fills in any missing ones with defaults.
+
+    If the file does not exist, it is created with the default settings. If it
+    cannot be parsed, the default settings are returned.
     """
     try:
-        with open("settings.json", "r", encoding="utf8") as file:
-            settings.update(json.load(file))
-        for key in __DEFAULT_SETTINGS:
-            if key not in settings:
-                settings[key] = __DEFAULT_SETTINGS[key]
+        with open(path, "r", encoding="utf8") as file:
+            values = json.load(file)
     except (FileNotFoundError):
-        print("Could not find settings.json. Creating the file with defaults.")
-        settings.update(__DEFAULT_SETTINGS)
-        save_settings()
+        print(f"Could not find {path}. Creating the file with defaults.")
+        values = dict(__DEFAULT_SETTINGS)
+        write_settings(values, path)
+        return values
     except (json.decoder.JSONDecodeError):
-        print("Could not parse settings.json. Using default settings.")
-        settings.update(__DEFAULT_SETTINGS)
-
-
-load_settings()
-
-
-class SettingsDialog(QDialog):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("zq settings")
-        self.setGeometry(100, 50, 800, 500)
-        layout = QVBoxLayout()
-
-        self.font_ = None
-        font_button = QPushButton("change font", self)
-        font_button.clicked.connect(self.change_font)
-        self.meeting_minutes = QLineEdit()
-        self.meeting_minutes.setText(str(settings["meeting minutes"]))
-        self.transition_seconds = QLineEdit()
-        self.transition_seconds.setText(str(settings["transition seconds"]))
-        self.welcome_message = QTextEdit()
-        self.welcome_message.setText(settings["welcome message"])
-        self.starting_message = QTextEdit()
-        self.starting_message.setText(settings["starting message"])
-        self.ending_message = QTextEdit()
-        self.ending_message.setText(settings["ending message"])
-
-        layout.addWidget(font_button)
-        layout.addWidget(QLabel("meeting minutes:"))
-        layout.addWidget(self.meeting_minutes)
-        layout.addWidget(QLabel("transition seconds:"))
-        layout.addWidget(self.transition_seconds)
-        layout.addWidget(QLabel("welcome message:"))
-        layout.addWidget(self.welcome_message)
-        layout.addWidget(QLabel("starting message:"))
-        layout.addWidget(self.starting_message)
-        layout.addWidget(QLabel("ending message:"))
-        layout.addWidget(self.ending_message)
-
-        buttons = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        layout.addWidget(buttons)
-
-        self.setLayout(layout)
-        self.show()
-
-    def exec(self) -> bool:
-        """Runs the settings dialog window.
-
-        Returns:
-            True if the user clicked the save button, False otherwise.
-        """
-        super().exec()
-        if self.result() != QDialog.Accepted:
-            return False
-        if self.font_ is not None:
-            settings["font"] = self.font_.family()
-            settings["font size"] = self.font_.pointSize()
-        try:
-            settings["meeting minutes"] = int(self.meeting_minutes.text())
-        except ValueError:
-            pass
-        try:
-            settings["transition seconds"] = int(self.transition_seconds.text())
-        except ValueError:
-            pass
-        settings["welcome message"] = self.welcome_message.toPlainText()
-        settings["starting message"] = self.starting_message.toPlainText()
-        settings["ending message"] = self.ending_message.toPlainText()
-        save_settings()
-        return True
-
-    def change_font(self) -> None:
-        ok, font_ = QFontDialog.getFont(
-            QFont(settings["font"], settings["font size"]), self
-        )
-        if ok:
-            self.font_ = font_
+        print(f"Could not parse {path}. Using default settings.")
+        return dict(__DEFAULT_SETTINGS)
+    for key in __DEFAULT_SETTINGS:
+        if key not in values:
+            values[key] = __DEFAULT_SETTINGS[key]
+    return values
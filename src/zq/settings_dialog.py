@@ -0,0 +1,100 @@
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import QDialog
+from PySide6.QtWidgets import QDialogButtonBox
+from PySide6.QtWidgets import QFontDialog
+from PySide6.QtWidgets import QLabel
+from PySide6.QtWidgets import QLineEdit
+from PySide6.QtWidgets import QPushButton
+from PySide6.QtWidgets import QTextEdit
+from PySide6.QtWidgets import QVBoxLayout
+
+try:
+    from settings import settings
+except ImportError:
+    from .settings import settings
+
+
+class SettingsDialog(QDialog):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("zq settings")
+        self.setGeometry(100, 50, 800, 500)
+        layout = QVBoxLayout()
+
+        self.font_ = None
+        font_button = QPushButton("change font", self)
+        font_button.clicked.connect(self.change_font)
+        self.meeting_minutes = QLineEdit()
+        self.meeting_minutes.setText(str(settings["meeting minutes"]))
+        self.transition_seconds = QLineEdit()
+        self.transition_seconds.setText(str(settings["transition seconds"]))
+        self.sound_theme = QLineEdit()
+        self.sound_theme.setText(settings["sound theme"])
+        self.welcome_message = QTextEdit()
+        self.welcome_message.setText(settings["welcome message"])
+        self.starting_message = QTextEdit()
+        self.starting_message.setText(settings["starting message"])
+        self.ending_message = QTextEdit()
+        self.ending_message.setText(settings["ending message"])
+
+        layout.addWidget(font_button)
+        layout.addWidget(QLabel("meeting minutes:"))
+        layout.addWidget(self.meeting_minutes)
+        layout.addWidget(QLabel("transition seconds:"))
+        layout.addWidget(self.transition_seconds)
+        layout.addWidget(
+            QLabel(
+                "sound theme (a theme name or a folder with warning.wav and error.wav):"
+            )
+        )
+        layout.addWidget(self.sound_theme)
+        layout.addWidget(QLabel("welcome message:"))
+        layout.addWidget(self.welcome_message)
+        layout.addWidget(QLabel("starting message:"))
+        layout.addWidget(self.starting_message)
+        layout.addWidget(QLabel("ending message:"))
+        layout.addWidget(self.ending_message)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.setLayout(layout)
+        self.show()
+
+    def exec(self) -> bool:
+        """Runs the settings dialog window.
+
+        Returns:
+            True if the user clicked the save button, False otherwise.
+        """
+        super().exec()
+        if self.result() != QDialog.Accepted:
+            return False
+        changes = {}
+        if self.font_ is not None:
+            changes["font"] = self.font_.family()
+            changes["font size"] = self.font_.pointSize()
+        try:
+            changes["meeting minutes"] = int(self.meeting_minutes.text())
+        except ValueError:
+            pass
+        try:
+            changes["transition seconds"] = int(self.transition_seconds.text())
+        except ValueError:
+            pass
+        if self.sound_theme.text().strip():
+            changes["sound theme"] = self.sound_theme.text().strip()
+        changes["welcome message"] = self.welcome_message.toPlainText()
+        changes["starting message"] = self.starting_message.toPlainText()
+        changes["ending message"] = self.ending_message.toPlainText()
+        settings.update(changes)
+        return True
+
+    def change_font(self) -> None:
+        ok, font_ = QFontDialog.getFont(
+            QFont(settings["font"], settings["font size"]), self
+        )
+        if ok:
+            self.font_ = font_
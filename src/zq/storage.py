@@ -0,0 +1,281 @@
+import sqlite3
+
+try:
+    from common import (
+        Break,
+        Mode,
+        parse_queue_entry,
+        SessionState,
+        Student,
+        StudentQueue,
+    )
+except ImportError:
+    from .common import (
+        Break,
+        Mode,
+        parse_queue_entry,
+        SessionState,
+        Student,
+        StudentQueue,
+    )
+try:
+    from instrumentation import timed
+except ImportError:
+    from .instrumentation import timed
+
+
+SCHEMA_VERSION = 2
+STUDENT = 0
+BREAK = 1
+
+
+class Storage:
+    """Saves the queue and session to a SQLite database as they change.
+
+    One connection is kept open for the app's lifetime, and each operation runs a
+    small statement that the sqlite3 module prepares once and then reuses.
+
+    The queue table has one row per entry ordered by position, and the session table
+    has one row with the timers and mode. The schema version is kept in the
+    database's user_version, and databases from older versions are migrated when
+    opened. Version 0 had only a students table with a seconds column that repeated
+    the current meeting's remaining seconds in every row, and version 1 did not save
+    the estimate of how long meetings take. Databases from newer versions are not
+    opened.
+    """
+
+    __CREATE_QUEUE = """
+        CREATE TABLE queue (
+            position INTEGER PRIMARY KEY,
+            kind INTEGER NOT NULL,
+            name TEXT,
+            minutes INTEGER);
+        """
+    __CREATE_SESSION = """
+        CREATE TABLE session (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            mode INTEGER NOT NULL,
+            paused INTEGER NOT NULL,
+            individual_seconds INTEGER NOT NULL,
+            group_seconds INTEGER NOT NULL,
+            previous_individual_seconds INTEGER,
+            meeting_mean REAL NOT NULL DEFAULT 0,
+            meeting_variance REAL NOT NULL DEFAULT 0,
+            meeting_count INTEGER NOT NULL DEFAULT 0);
+        """
+    __ADD_ESTIMATE_COLUMNS = (
+        "ALTER TABLE session ADD COLUMN meeting_mean REAL NOT NULL DEFAULT 0",
+        "ALTER TABLE session ADD COLUMN meeting_variance REAL NOT NULL DEFAULT 0",
+        "ALTER TABLE session ADD COLUMN meeting_count INTEGER NOT NULL DEFAULT 0",
+    )
+    __LOAD_QUEUE = "SELECT kind, name, minutes FROM queue ORDER BY position"
+    __LOAD_SESSION = """
+        SELECT mode, paused, individual_seconds, group_seconds,
+            previous_individual_seconds, meeting_mean, meeting_variance, meeting_count
+        FROM session
+        """
+    __SAVE_SESSION = """
+        INSERT OR REPLACE INTO session (id, mode, paused, individual_seconds,
+            group_seconds, previous_individual_seconds, meeting_mean,
+            meeting_variance, meeting_count)
+        VALUES (0, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+    __APPEND = "INSERT INTO queue (kind, name, minutes) VALUES (?, ?, ?)"
+    __REMOVE = """
+        DELETE FROM queue
+        WHERE position = (SELECT position FROM queue ORDER BY position LIMIT 1 OFFSET ?)
+        """
+    __REMOVE_LAST = """
+        DELETE FROM queue
+        WHERE position IN (SELECT position FROM queue ORDER BY position DESC LIMIT ?)
+        """
+    __POSITION_AT = "SELECT position FROM queue ORDER BY position LIMIT 1 OFFSET ?"
+    # Rows cannot be moved up by one in place because each position must stay
+    # unique, so they are moved past the end first and then back.
+    __MOVE_PAST_END = """
+        UPDATE queue SET position = position + :offset WHERE position >= :position
+        """
+    __MOVE_BACK = """
+        UPDATE queue SET position = position - :offset + 1
+        WHERE position >= :position + :offset
+        """
+    __GET_OFFSET = "SELECT MAX(position) - MIN(position) + 2 FROM queue"
+    __INSERT = "INSERT INTO queue (position, kind, name, minutes) VALUES (?, ?, ?, ?)"
+    __SET_LAST_BREAK_MINUTES = """
+        UPDATE queue SET minutes = ?
+        WHERE position = (SELECT MAX(position) FROM queue)
+        """
+    __ROTATE_FORWARDS = """
+        UPDATE queue SET position = (SELECT MAX(position) FROM queue) + 1
+        WHERE position = (SELECT MIN(position) FROM queue)
+        """
+    __ROTATE_BACKWARDS = """
+        UPDATE queue SET position = (SELECT MIN(position) FROM queue) - 1
+        WHERE position = (SELECT MAX(position) FROM queue)
+        """
+    __DELETE_ALL = "DELETE FROM queue"
+
+    def __init__(self, path: str = "students.db"):
+        self.__conn = sqlite3.connect(path, cached_statements=32)
+        # Write-ahead logging with normal syncing makes each small write cheap
+        # while still keeping the database consistent after a crash.
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute("PRAGMA synchronous=NORMAL")
+        self.__migrate()
+
+    def close(self) -> None:
+        self.__conn.close()
+
+    @timed("Storage.load")
+    def load(self) -> tuple[StudentQueue, SessionState | None]:
+        """Loads the queue and the session in one read transaction.
+
+        The session is None if none has been saved yet.
+        """
+        with self.__conn:
+            # sqlite3 does not begin transactions before SELECT statements by itself.
+            self.__conn.execute("BEGIN")
+            session = self.__conn.execute(self.__LOAD_SESSION).fetchone()
+            rows = self.__conn.execute(self.__LOAD_QUEUE).fetchall()
+        queue = StudentQueue(
+            Break(minutes) if kind == BREAK else Student(name)
+            for kind, name, minutes in rows
+        )
+        if session is None:
+            return queue, None
+        mode, paused, *rest = session
+        return queue, SessionState(Mode(mode), bool(paused), *rest)
+
+    @timed("Storage.save_session")
+    def save_session(self, state: SessionState) -> None:
+        """Saves the timers and mode."""
+        with self.__conn:
+            self.__conn.execute(
+                self.__SAVE_SESSION,
+                (
+                    state.mode.value,
+                    int(state.paused),
+                    state.individual_seconds,
+                    state.group_seconds,
+                    state.previous_individual_seconds,
+                    state.meeting_mean,
+                    state.meeting_variance,
+                    state.meeting_count,
+                ),
+            )
+
+    @timed("Storage.append")
+    def append(self, entry: Student | Break) -> None:
+        """Saves an entry added to the end of the queue."""
+        with self.__conn:
+            self.__conn.execute(self.__APPEND, self.__to_row(entry))
+
+    @timed("Storage.extend")
+    def extend(self, entries: list[Student | Break]) -> None:
+        """Saves entries added to the end of the queue in one transaction."""
+        with self.__conn:
+            self.__conn.executemany(self.__APPEND, map(self.__to_row, entries))
+
+    @timed("Storage.remove")
+    def remove(self, index: int) -> None:
+        """Deletes the entry at an index of the queue."""
+        with self.__conn:
+            self.__conn.execute(self.__REMOVE, (index,))
+
+    @timed("Storage.insert")
+    def insert(self, index: int, entry: Student | Break) -> None:
+        """Saves an entry inserted before an index of the queue."""
+        with self.__conn:
+            row = self.__conn.execute(self.__POSITION_AT, (index,)).fetchone()
+            if row is None:
+                self.__conn.execute(self.__APPEND, self.__to_row(entry))
+                return
+            names = {
+                "position": row[0],
+                "offset": self.__conn.execute(self.__GET_OFFSET).fetchone()[0],
+            }
+            self.__conn.execute(self.__MOVE_PAST_END, names)
+            self.__conn.execute(self.__MOVE_BACK, names)
+            self.__conn.execute(self.__INSERT, (row[0], *self.__to_row(entry)))
+
+    @timed("Storage.remove_last")
+    def remove_last(self, count: int = 1) -> None:
+        """Deletes entries from the end of the queue."""
+        with self.__conn:
+            self.__conn.execute(self.__REMOVE_LAST, (count,))
+
+    @timed("Storage.set_last_break_minutes")
+    def set_last_break_minutes(self, minutes: int) -> None:
+        """Changes the length of the break at the end of the queue."""
+        with self.__conn:
+            self.__conn.execute(self.__SET_LAST_BREAK_MINUTES, (minutes,))
+
+    @timed("Storage.rotate")
+    def rotate(self, forwards: bool) -> None:
+        """Saves a rotation of the queue by changing one row's position.
+
+        Parameters
+        ----------
+        forwards : bool
+            If True, the first entry is moved to the end. Otherwise, the last entry
+            is moved to the front.
+        """
+        with self.__conn:
+            if forwards:
+                self.__conn.execute(self.__ROTATE_FORWARDS)
+            else:
+                self.__conn.execute(self.__ROTATE_BACKWARDS)
+
+    @timed("Storage.save_all")
+    def save_all(self, queue: StudentQueue) -> None:
+        """Replaces all entries, such as after the queue was shuffled."""
+        with self.__conn:
+            self.__conn.execute(self.__DELETE_ALL)
+            self.__conn.executemany(self.__APPEND, map(self.__to_row, queue))
+
+    @staticmethod
+    def __to_row(entry: Student | Break) -> tuple[int, str | None, int | None]:
+        if isinstance(entry, Break):
+            return BREAK, None, entry.minutes
+        return STUDENT, entry.name, None
+
+    def __migrate(self) -> None:
+        """Creates the tables or upgrades them from an older schema version."""
+        version = self.__conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+        if version > SCHEMA_VERSION:
+            # Its tables might not be usable by this version, and changing them could
+            # lose data that the newer version saved.
+            self.__conn.close()
+            raise sqlite3.DatabaseError(
+                f"The database was saved by a newer version of zq (schema version"
+                f" {version}). Update zq to open it."
+            )
+        with self.__conn:
+            self.__conn.execute("BEGIN")
+            if version < 1:
+                self.__conn.execute(self.__CREATE_QUEUE)
+                self.__conn.execute(self.__CREATE_SESSION)
+                has_students_table = self.__conn.execute(
+                    "SELECT 1 FROM sqlite_master"
+                    " WHERE type = 'table' AND name = 'students'"
+                ).fetchone()
+                if has_students_table:
+                    rows = self.__conn.execute(
+                        "SELECT name, seconds FROM students ORDER BY id"
+                    ).fetchall()
+                    self.__conn.executemany(
+                        self.__APPEND,
+                        (self.__to_row(parse_queue_entry(name)) for name, _ in rows),
+                    )
+                    if rows:
+                        self.__conn.execute(
+                            self.__SAVE_SESSION,
+                            (Mode.GROUP.value, 1, rows[0][1], 0, None, 0, 0, 0),
+                        )
+                    self.__conn.execute("DROP TABLE students")
+            elif version == 1:
+                for statement in self.__ADD_ESTIMATE_COLUMNS:
+                    self.__conn.execute(statement)
+            self.__conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
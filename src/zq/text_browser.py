@@ -0,0 +1,271 @@
+import os
+import re
+
+from PySide6.QtCore import QEvent
+from PySide6.QtCore import QObject
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QRegion
+from PySide6.QtGui import QTextBlock
+from PySide6.QtGui import QTextCharFormat
+from PySide6.QtGui import QTextCursor
+from PySide6.QtWidgets import QTextBrowser
+
+try:
+    from common import compile_Rich_style
+except ImportError:
+    from .common import compile_Rich_style
+try:
+    import instrumentation
+except ImportError:
+    from . import instrumentation
+
+
+tag_pattern = re.compile(r"<[^>]*>")
+
+
+class DamageCounter(QObject):
+    """Tallies how many pixels of a widget are repainted each time it is painted."""
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if event.type() == QEvent.Paint:
+            instrumentation.tally(
+                f"{self.name} damaged px",
+                sum(rect.width() * rect.height() for rect in event.region()),
+            )
+        return False
+
+
+class MyTextBrowser(QTextBrowser):
+    """A QTextBrowser that can update its text without rebuilding its document.
+
+    The HTML of each line that was last shown is remembered so that later updates
+    only need to rewrite the lines that changed.
+
+    If minimal_repaints is True, a line where only some text changed, such as the
+    digits of a timer, has only those characters replaced, and only the pixels they
+    cover are repainted instead of every line from the first change down. This
+    keeps screen sharing from sending the whole window each second.
+    """
+
+    def __init__(self, name: str = "text browser"):
+        super().__init__()
+        self.setObjectName(name)
+        self.minimal_repaints = False
+        self.__html_lines: list[str] = []
+        if instrumentation.ENABLED:
+            self.__damage_counter = DamageCounter(name)
+            self.viewport().installEventFilter(self.__damage_counter)
+
+    @instrumentation.timed("MyTextBrowser.set_text")
+    def set_text(self, text: str) -> None:
+        """Formats and sets text, rebuilding the whole document."""
+        self.__set_html_lines(self.__to_html_lines(compile_Rich_style(text)))
+
+    def update_text(self, text: str) -> None:
+        """Formats and sets text, rewriting only the lines that changed.
+
+        The document is only rebuilt if the number of lines changed.
+        """
+        self.update_html(compile_Rich_style(text))
+
+    @instrumentation.timed("MyTextBrowser.update_html")
+    def update_html(self, html: str) -> None:
+        """Sets HTML text, rewriting only the lines that changed.
+
+        The document is only rebuilt if the number of lines changed.
+        """
+        html_lines = self.__to_html_lines(html)
+        if len(html_lines) != len(self.__html_lines):
+            self.__set_html_lines(html_lines)
+            return
+        if self.minimal_repaints:
+            self.__update_with_minimal_repaints(html_lines)
+            return
+        document = self.document()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        for i, (old_line, new_line) in enumerate(zip(self.__html_lines, html_lines)):
+            if old_line != new_line:
+                self.__replace_line(cursor, document.findBlockByNumber(i), new_line)
+        cursor.endEditBlock()
+        self.__html_lines = html_lines
+
+    def __update_with_minimal_repaints(self, html_lines: list[str]) -> None:
+        """Rewrites the lines that changed and repaints only the changed pixels.
+
+        The document layout's signals, which would repaint every line from the
+        first change down, are blocked while the document changes. The area to
+        repaint is found from where the changed text was and now is instead.
+        """
+        document = self.document()
+        layout = document.documentLayout()
+        size = layout.documentSize()
+        changes = []  # (block number, text change or None, old area) for each line
+        for i, (old_line, new_line) in enumerate(zip(self.__html_lines, html_lines)):
+            if old_line == new_line:
+                continue
+            block = document.findBlockByNumber(i)
+            change = self.__find_text_change(block, old_line, new_line)
+            if change is None:
+                changes.append((i, None, self.__get_block_rect(block)))
+            else:
+                start = block.position() + change[0]
+                changes.append(
+                    (i, change, self.__get_text_rect(block, start, len(change[1])))
+                )
+        if not changes:
+            self.__html_lines = html_lines
+            return
+        cursor = QTextCursor(document)
+        layout.blockSignals(True)
+        try:
+            cursor.beginEditBlock()
+            for i, change, _ in changes:
+                block = document.findBlockByNumber(i)
+                if change is None:
+                    self.__replace_line(cursor, block, html_lines[i])
+                else:
+                    self.__replace_text(
+                        cursor, block.position() + change[0], *change[1:]
+                    )
+            cursor.endEditBlock()
+        finally:
+            layout.blockSignals(False)
+        self.__html_lines = html_lines
+        if layout.documentSize() != size:
+            # Lines moved, so everything below them might have changed.
+            layout.documentSizeChanged.emit(layout.documentSize())
+            self.viewport().update()
+            return
+        damage = QRegion()
+        for i, change, old_rect in changes:
+            block = document.findBlockByNumber(i)
+            if change is None:
+                new_rect = self.__get_block_rect(block)
+            else:
+                start = block.position() + change[0]
+                new_rect = self.__get_text_rect(block, start, len(change[2]))
+            damage += self.__join_rects(block, old_rect, new_rect)
+        self.viewport().update(damage)
+
+    @staticmethod
+    def __find_text_change(
+        block: QTextBlock, old_line: str, new_line: str
+    ) -> tuple[int, str, str] | None:
+        """Finds the text that changed between two lines of HTML.
+
+        Returns
+        -------
+        tuple[int, str, str] | None
+            The index in the block's text where the change starts, the old text, and
+            the new text. None if any tags changed or the line's text could not be
+            matched to the block's text.
+        """
+        start = len(os.path.commonprefix((old_line, new_line)))
+        end = len(
+            os.path.commonprefix((old_line[start:][::-1], new_line[start:][::-1]))
+        )
+        old_end = len(old_line) - end
+        new_end = len(new_line) - end
+        old_text = old_line[start:old_end]
+        new_text = new_line[start:new_end]
+        prefix = old_line[:start]
+        if (
+            any(character in old_text + new_text for character in "<>&")
+            or prefix.rfind("<") > prefix.rfind(">")
+            or tag_pattern.sub("", old_line) != block.text()
+        ):
+            return None
+        return len(tag_pattern.sub("", prefix)), old_text, new_text
+
+    def __get_text_rect(
+        self, block: QTextBlock, start: int, length: int
+    ) -> tuple[QRect, QRect, QRect]:
+        """Returns the area in the viewport covered by some of a block's text.
+
+        The cursor rectangles at the start and end of the block are also returned
+        so that it can be told whether the rest of the line moved.
+        """
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(start)
+        rect = self.cursorRect(cursor)
+        cursor.setPosition(start + length)
+        rect = rect.united(self.cursorRect(cursor))
+        cursor.setPosition(block.position() + block.length() - 1)
+        line_end = self.cursorRect(cursor)
+        cursor.setPosition(block.position())
+        line_start = self.cursorRect(cursor)
+        # Antialiasing and glyphs that lean past their advance can touch a couple of
+        # pixels on either side.
+        return rect.adjusted(-2, 0, 2, 0), line_start, line_end
+
+    def __get_block_rect(self, block: QTextBlock) -> QRect:
+        """Returns the area in the viewport covered by a block."""
+        rect = self.document().documentLayout().blockBoundingRect(block)
+        return rect.toAlignedRect().translated(
+            -self.horizontalScrollBar().value(), -self.verticalScrollBar().value()
+        )
+
+    def __join_rects(
+        self,
+        block: QTextBlock,
+        old: QRect | tuple[QRect, QRect, QRect],
+        new: QRect | tuple[QRect, QRect, QRect],
+    ) -> QRegion:
+        """Returns the region to repaint for a block's old and new areas."""
+        if isinstance(old, QRect):
+            return QRegion(old.united(new))
+        (old_rect, old_start, old_end), (new_rect, new_start, new_end) = old, new
+        if old_start != new_start:
+            # The whole line moved, such as because it is centered.
+            return QRegion(self.__get_block_rect(block))
+        rect = old_rect.united(new_rect)
+        if old_end != new_end:
+            # The rest of the line moved.
+            rect = rect.united(old_end.adjusted(0, 0, 2, 0)).united(
+                new_end.adjusted(0, 0, 2, 0)
+            )
+        return QRegion(rect)
+
+    @staticmethod
+    def __replace_line(cursor: QTextCursor, block: QTextBlock, html: str) -> None:
+        cursor.setPosition(block.position())
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        cursor.setCharFormat(QTextCharFormat())
+        cursor.insertHtml(html)
+
+    @staticmethod
+    def __replace_text(
+        cursor: QTextCursor, start: int, old_text: str, new_text: str
+    ) -> None:
+        """Replaces text, keeping the formatting of its first character."""
+        # A cursor's format is that of the character before it.
+        cursor.setPosition(start + 1 if old_text else start)
+        char_format = cursor.charFormat()
+        cursor.setPosition(start)
+        cursor.setPosition(start + len(old_text), QTextCursor.KeepAnchor)
+        cursor.insertText(new_text, char_format)
+
+    def __set_html_lines(self, html_lines: list[str]) -> None:
+        # Each line must be appended individually because QTextBrowser.setText does
+        # not allow both HTML and newlines in the same string.
+        self.clear()
+        self.setCurrentCharFormat(QTextCharFormat())
+        for line in html_lines:
+            self.append(line)
+        self.scrollToAnchor("top")
+        if self.document().blockCount() == len(html_lines):
+            self.__html_lines = html_lines
+        else:
+            # Some HTML, such as lists, creates more than one block per line, so the
+            # lines cannot be matched to blocks for incremental updates.
+            self.__html_lines = []
+
+    @staticmethod
+    def __to_html_lines(html: str) -> list[str]:
+        return html.rstrip("\n").split("\n")
@@ -0,0 +1,132 @@
+from PySide6.QtCore import QAbstractListModel
+from PySide6.QtCore import QModelIndex
+from PySide6.QtCore import QSize
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QAbstractItemView
+from PySide6.QtWidgets import QListView
+from PySide6.QtWidgets import QStyledItemDelegate
+
+try:
+    from common import format_time, StudentQueue
+except ImportError:
+    from .common import format_time, StudentQueue
+
+
+ETA_ROLE = Qt.UserRole + 1
+
+
+class WaitlistModel(QAbstractListModel):
+    """A list model of everyone waiting in a queue.
+
+    Nothing is stored per row. Each row's name and estimated wait time are read from
+    the queue only when the view asks for them, which it only does for rows that
+    are visible.
+    """
+
+    def __init__(self, queue: StudentQueue):
+        super().__init__()
+        self.__queue = queue
+        self.__queue_version = queue.version
+        self.__individual_seconds = 0
+        self.__meeting_seconds = 0
+        self.__show_times = False
+        self.__row_count = 0
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self.__row_count
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self.__row_count:
+            return None
+        if role == Qt.DisplayRole:
+            return self.__queue[index.row() + 1].name
+        if role == ETA_ROLE and self.__show_times:
+            _, seconds = self.__queue.get_waiting(index.row(), self.__meeting_seconds)
+            return self.__individual_seconds + seconds
+        return None
+
+    def update(
+        self,
+        individual_seconds: int,
+        meeting_seconds: int,
+        show_times: bool,
+        visible: bool = True,
+    ) -> None:
+        """Updates the model after the queue or the timer changed.
+
+        The model is only reset if the queue or what is shown changed. Otherwise,
+        only the wait times are marked as changed so that the view repaints them.
+
+        Parameters
+        ----------
+        individual_seconds : int
+            The number of seconds remaining for the individual meeting.
+        meeting_seconds : int
+            The expected duration in seconds of each student's meeting.
+        show_times : bool
+            Whether to show wait times.
+        visible : bool
+            Whether to show anyone. If False, the model has no rows.
+        """
+        row_count = max(len(self.__queue) - 1, 0) if visible else 0
+        if (
+            row_count != self.__row_count
+            or self.__queue.version != self.__queue_version
+            or show_times != self.__show_times
+            or meeting_seconds != self.__meeting_seconds
+        ):
+            self.beginResetModel()
+            self.__row_count = row_count
+            self.__queue_version = self.__queue.version
+            self.__show_times = show_times
+            self.__meeting_seconds = meeting_seconds
+            self.__individual_seconds = individual_seconds
+            self.endResetModel()
+        elif individual_seconds != self.__individual_seconds:
+            self.__individual_seconds = individual_seconds
+            if show_times and row_count:
+                self.dataChanged.emit(
+                    self.index(0), self.index(row_count - 1), [ETA_ROLE]
+                )
+
+
+class WaitlistDelegate(QStyledItemDelegate):
+    """Paints a waitlist row like a line of the timer message."""
+
+    def paint(self, painter, option, index: QModelIndex) -> None:
+        painter.save()
+        painter.setFont(option.font)
+        rect = option.rect
+        name = index.data(Qt.DisplayRole)
+        seconds = index.data(ETA_ROLE)
+        if seconds is not None:
+            time = format_time(seconds) + " "
+            painter.setPen(QColor("#00ff00"))
+            painter.drawText(rect, Qt.AlignLeft | Qt.AlignTop, time)
+            rect = rect.adjusted(option.fontMetrics.horizontalAdvance(time), 0, 0, 0)
+        painter.setPen(option.palette.text().color())
+        painter.drawText(rect, Qt.AlignLeft | Qt.AlignTop, name)
+        painter.restore()
+
+    def sizeHint(self, option, index: QModelIndex) -> QSize:
+        line_spacing = option.fontMetrics.lineSpacing()
+        if index.data(ETA_ROLE) is None:
+            return QSize(0, line_spacing)
+        # Waiting students with wait times have a blank line between them.
+        return QSize(0, line_spacing * 2)
+
+
+class WaitlistView(QListView):
+    """A list view that only lays out and paints the waitlist rows on screen."""
+
+    def __init__(self, model: WaitlistModel):
+        super().__init__()
+        self.setModel(model)
+        self.setItemDelegate(WaitlistDelegate(self))
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
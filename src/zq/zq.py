@@ -1,88 +1,102 @@
+import math
 import os
-import random
-import sqlite3
+from time import monotonic
 
-import chime  # https://pypi.org/project/chime/
 from PySide6.QtCore import Qt
 from PySide6.QtCore import QTimer
 from PySide6.QtGui import QFont
 from PySide6.QtGui import QIcon
-from PySide6.QtGui import QTextCharFormat
+from PySide6.QtWidgets import QApplication
 from PySide6.QtWidgets import QGridLayout
-from PySide6.QtWidgets import QTextBrowser
+from PySide6.QtWidgets import QLabel
 from PySide6.QtWidgets import QWidget
 
 try:
     from common import (
-        add_5_minute_break,
-        convert_Rich_style_to_html,
         get_about_text,
         get_help_text,
+        get_mode_names,
         get_timer_message,
-        go_to_next_student,
-        load_students,
         Mode,
-        remove_last_student,
-        return_to_previous_meeting,
+        parse_names,
+        parse_roster,
         VERSION,
     )
 except ImportError:
     from .common import (
-        add_5_minute_break,
-        convert_Rich_style_to_html,
         get_about_text,
         get_help_text,
+        get_mode_names,
         get_timer_message,
-        go_to_next_student,
-        load_students,
         Mode,
-        remove_last_student,
-        return_to_previous_meeting,
+        parse_names,
+        parse_roster,
         VERSION,
     )
+try:
+    from engine import Engine
+except ImportError:
+    from .engine import Engine
+try:
+    import instrumentation
+except ImportError:
+    from . import instrumentation
+try:
+    from events import EventLog
+except ImportError:
+    from .events import EventLog
+try:
+    from keymap import Command, Keymap
+except ImportError:
+    from .keymap import Command, Keymap
 try:
     from line_edit import MyLineEdit
 except ImportError:
     from .line_edit import MyLineEdit
 try:
-    from settings import settings, save_settings, SettingsDialog
+    from settings import settings
 except ImportError:
-    from .settings import settings, save_settings, SettingsDialog
-
-
-def set_QTextBrowser_text(tb: QTextBrowser, text: str) -> None:
-    """Formats and sets text for a QTextBrowser."""
-    # Each line must be appended individually because QTextBrowser.setText does
-    # not allow both HTML and newlines in the same string.
-    tb.clear()
-    tb.setCurrentCharFormat(QTextCharFormat())
-    for line in convert_Rich_style_to_html(text.rstrip("\n")).split("\n"):
-        tb.append(line)
-    tb.scrollToAnchor("top")
+    from .settings import settings
+try:
+    from storage import Storage
+except ImportError:
+    from .storage import Storage
+try:
+    from text_browser import MyTextBrowser
+except ImportError:
+    from .text_browser import MyTextBrowser
+try:
+    from waitlist import WaitlistModel, WaitlistView
+except ImportError:
+    from .waitlist import WaitlistModel, WaitlistView
 
 
 class ZQ(QWidget):
     def __init__(self):
         super().__init__()
-        chime.theme("material")
+        self.alerts = None  # loaded after the window appears to start faster
+        # The timer only runs while a meeting timer is counting, and each timeout is
+        # scheduled for when the shown time next changes.
         self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
         self.timer.timeout.connect(self.tick)
-        self.timer.start(1000)
-        self.max_individual_seconds = 0
-        self.update_max_individual_seconds()
-        self.min_empty_waitlist_seconds = settings["meeting minutes"] / 2 * 60
-        self.group_seconds = 0  # counts up
         self.mode_names = []
         self.update_mode_names()
-        self.current_mode = Mode.GROUP
-        (self.student_names, self.individual_seconds) = load_students(
-            self.max_individual_seconds
+        self.engine = Engine(
+            Storage(),
+            settings["meeting minutes"],
+            settings["transition seconds"],
+            settings["undo depth"],
+            EventLog(),
+            settings["wait estimate"],
         )
-        self.paused = True
-        self.previous_individual_seconds = None
-
+        self.engine.subscribe(self.update_timer_message)
         self.__showing_help = False
         self.__showing_about = False
+        self.__render_pending = False
+        self.__tick_due = None  # when the next tick should happen, if instrumented
+        self.stats_overlay = None
 
         self.line_edit = MyLineEdit()
         self.line_edit.grabKeyboard()
@@ -90,169 +104,262 @@ class ZQ(QWidget):
         self.line_edit.return_new_name.connect(self.append_name)
         self.line_edit.return_existing_name.connect(self.remove_name)
         self.line_edit.return_minutes.connect(self.change_minutes)
-        self.line_edit.char_key_pressed.connect(self.handle_char_key_pressed)
-        self.line_edit.f11_key_pressed.connect(self.toggle_fullscreen)
-        self.line_edit.ctrl_w_pressed.connect(self.close)
-        self.line_edit.ctrl_c_pressed.connect(self.copy)
+        self.keymap = Keymap(self.get_commands(), settings["keymap"])
+        self.line_edit.handle_key = self.keymap.dispatch
+        self.line_edit.suggest_names = self.engine.queue.suggest_names
 
-        self.welcome = QTextBrowser()
+        self.welcome = MyTextBrowser("welcome")
         self.welcome.setAcceptRichText(True)
         self.welcome.setOpenExternalLinks(True)
         self.welcome.setFont(QFont(settings["font"], settings["font size"]))
         self.welcome.alignment = Qt.AlignLeft
         self.welcome.alignment = Qt.AlignVCenter
         self.welcome.setViewportMargins(25, 25, 25, 25)
-        set_QTextBrowser_text(self.welcome, settings["welcome message"])
+        self.welcome.set_text(settings["welcome message"])
 
-        self.timer_message = QTextBrowser()
+        self.timer_message = MyTextBrowser("timer message")
+        self.timer_message.minimal_repaints = settings["minimal repaints"]
         self.timer_message.setAcceptRichText(True)
         self.timer_message.setOpenExternalLinks(True)
         self.timer_message.setFont(QFont(settings["font"], settings["font size"]))
         self.timer_message.alignment = Qt.AlignLeft
         self.timer_message.alignment = Qt.AlignVCenter
         self.timer_message.setViewportMargins(100, 25, 25, 25)
-        set_QTextBrowser_text(
-            self.timer_message, "[#8E8E8E](no students in queue)[/#8E8E8E]"
-        )
+        self.timer_message.update_text("[#8E8E8E](no students in queue)[/#8E8E8E]")
+
+        self.waitlist = None
+        if settings["virtualized waitlist"]:
+            # Everyone waiting is shown in a list view that only lays out and paints
+            # the rows on screen, which is much faster for very large queues.
+            self.waitlist_model = WaitlistModel(self.engine.queue)
+            self.waitlist = WaitlistView(self.waitlist_model)
+            self.waitlist.setFont(QFont(settings["font"], settings["font size"]))
+            self.waitlist.setViewportMargins(100, 0, 25, 25)
 
         self.layout = QGridLayout(self)
-        self.layout.addWidget(self.welcome, 0, 0)
-        self.layout.addWidget(self.timer_message, 0, 1)
-        self.layout.addWidget(self.line_edit, 1, 0, 1, 2)
+        if self.waitlist is None:
+            self.layout.addWidget(self.welcome, 0, 0)
+            self.layout.addWidget(self.timer_message, 0, 1)
+            self.layout.addWidget(self.line_edit, 1, 0, 1, 2)
+        else:
+            self.layout.addWidget(self.welcome, 0, 0, 2, 1)
+            self.layout.addWidget(self.timer_message, 0, 1)
+            self.layout.addWidget(self.waitlist, 1, 1)
+            self.layout.addWidget(self.line_edit, 2, 0, 1, 2)
+            self.layout.setRowStretch(0, 1)
+            self.layout.setRowStretch(1, 3)
+
+        settings.subscribe(("font", "font size"), self.update_font)
+        settings.subscribe(
+            ("meeting minutes", "transition seconds"), self.update_meeting_length
+        )
+        settings.subscribe(("welcome message",), self.update_welcome_message)
+        settings.subscribe(
+            ("starting message", "ending message"), self.update_timer_message
+        )
+        settings.subscribe(("sound theme",), self.update_sound_theme)
+        settings.subscribe(("undo depth",), self.update_undo_depth)
+        settings.subscribe(("wait estimate",), self.update_wait_estimate)
+        settings.subscribe(("minimal repaints",), self.update_minimal_repaints)
+        settings.subscribe(("keymap",), self.update_keymap)
 
         self.setWindowTitle("zq")
-        if os.path.exists("app"):
-            self.setWindowIcon(QIcon("app/zq/resources/timer.svg"))
-        else:
-            self.setWindowIcon(QIcon("src/zq/resources/timer.svg"))
+        self.setWindowIcon(
+            QIcon(os.path.join(os.path.dirname(__file__), "resources", "timer.svg"))
+        )
         self.setGeometry(
             100, 50, 800, 500
         )  # This forces the window to open on a certain screen (the "primary" screen?).
         self.setContentsMargins(10, 10, 10, 10)
         self.showMaximized()
+        QTimer.singleShot(0, self.load_alerts)
+        self.update_timer_message()
 
-    def __del__(self):
-        self.save_all_students()
+    def closeEvent(self, event) -> None:
+        self.timer.stop()
+        self.engine.close()
+        settings.flush()
+        if instrumentation.ENABLED:
+            instrumentation.export()
+        super().closeEvent(event)
+
+    def load_alerts(self):
+        """Loads the alert sounds of the sound theme in the settings."""
+        try:
+            from audio import AlertPlayer
+        except ImportError:
+            from .audio import AlertPlayer
+        self.alerts = AlertPlayer(settings["sound theme"])
 
     def append_name(self, name: str):
-        self.student_names.append(name)
-        self.update_timer_message()
+        self.engine.append_name(name)
+
+    def paste_names(self) -> bool:
+        """Adds each name in the clipboard to the queue."""
+        text = QApplication.clipboard().text()
+        return self.engine.append_names(parse_names(text.splitlines())) > 0
+
+    def import_names(self, path: str, column: str | None = None):
+        """Adds each name in a text or CSV file to the queue.
+
+        For a CSV file with more than one column, only the names in one column are
+        added. See parse_roster.
+        """
+        with open(path, "r", encoding="utf-8-sig", newline="") as file:
+            self.engine.append_names(parse_roster(file, column))
 
     def update_font(self):
         self.welcome.setFont(QFont(settings["font"], settings["font size"]))
         self.timer_message.setFont(QFont(settings["font"], settings["font size"]))
+        if self.waitlist is not None:
+            self.waitlist.setFont(QFont(settings["font"], settings["font size"]))
 
     def update_mode_names(self):
-        self.mode_names = [0] * len(Mode)
-        self.mode_names[Mode.GROUP.value] = "group meeting"
-        self.mode_names[
-            Mode.INDIVIDUAL.value
-        ] = f"{settings['meeting minutes']}-minute individual meetings"
-        self.mode_names[Mode.START.value] = "start"
-        self.mode_names[Mode.END.value] = "end"
-
-    def update_max_individual_seconds(self):
-        self.max_individual_seconds = (
-            settings["meeting minutes"] * 60 + settings["transition seconds"]
+        self.mode_names = get_mode_names(settings["meeting minutes"])
+
+    def update_meeting_length(self):
+        self.update_mode_names()
+        self.engine.set_meeting_length(
+            settings["meeting minutes"], settings["transition seconds"]
         )
 
+    def update_welcome_message(self):
+        if not self.__showing_help and not self.__showing_about:
+            self.welcome.set_text(settings["welcome message"])
+
+    def update_sound_theme(self):
+        if self.alerts is not None and settings["sound theme"] != self.alerts.theme:
+            self.load_alerts()
+
+    def update_undo_depth(self):
+        self.engine.set_undo_depth(settings["undo depth"])
+
+    def update_minimal_repaints(self):
+        self.timer_message.minimal_repaints = settings["minimal repaints"]
+
+    def update_keymap(self):
+        self.keymap.bind(settings["keymap"])
+        if self.__showing_help:
+            self.welcome.set_text(get_help_text(self.keymap.get_shortcuts()))
+
+    def update_wait_estimate(self):
+        self.engine.wait_estimate = settings["wait estimate"]
+        self.update_timer_message()
+
     def update_timer_message(self):
-        if self.current_mode == Mode.START:
-            set_QTextBrowser_text(self.timer_message, settings["starting message"])
-        elif self.current_mode == Mode.END:
-            set_QTextBrowser_text(self.timer_message, settings["ending message"])
-        elif not self.student_names:
-            set_QTextBrowser_text(
-                self.timer_message, "[#8E8E8E](no students in queue)[/#8E8E8E]"
-            )
+        """Marks the timer message as outdated.
+
+        The timer message is rendered once control returns to the event loop, so any
+        number of engine changes in the same event loop turn cause only one render.
+        """
+        if not self.__render_pending:
+            self.__render_pending = True
+            QTimer.singleShot(0, self.__refresh)
+
+    def __refresh(self):
+        self.__render_pending = False
+        self.render_timer_message()
+        self.schedule_tick()
+
+    @instrumentation.timed("render_timer_message")
+    def render_timer_message(self):
+        engine = self.engine
+        if engine.current_mode == Mode.START:
+            self.timer_message.update_text(settings["starting message"])
+        elif engine.current_mode == Mode.END:
+            self.timer_message.update_text(settings["ending message"])
+        elif not engine.queue:
+            self.timer_message.update_text("[#8E8E8E](no students in queue)[/#8E8E8E]")
         else:
-            set_QTextBrowser_text(
-                self.timer_message,
+            self.timer_message.update_html(
                 get_timer_message(
-                    self.current_mode,
+                    engine.current_mode,
                     self.mode_names,
-                    self.student_names,
-                    self.group_seconds,
-                    self.individual_seconds,
-                    self.max_individual_seconds,
+                    engine.queue,
+                    engine.group_seconds,
+                    engine.individual_seconds,
+                    engine.meeting_seconds,
+                    include_waiting=self.waitlist is None,
                 ),
             )
+        if self.waitlist is not None:
+            self.waitlist_model.update(
+                engine.individual_seconds,
+                engine.meeting_seconds,
+                show_times=engine.current_mode == Mode.INDIVIDUAL,
+                visible=engine.current_mode in (Mode.GROUP, Mode.INDIVIDUAL),
+            )
 
     def remove_name(self):
-        name = self.line_edit.text()
-        names = self.student_names
-        if name in names:
-            names.remove(name)
-        if names:
-            if names[0].endswith("-minute break"):
-                self.individual_seconds = int(names[0].split("-")[0]) * 60
-            else:
-                self.individual_seconds = self.max_individual_seconds
-        self.update_timer_message()
+        self.engine.remove_name(self.line_edit.text())
 
     def change_minutes(self):
         minutes = self.line_edit.text()
         if minutes.isdigit() and int(minutes) > 0:
             settings["meeting minutes"] = int(minutes)
-            self.update_max_individual_seconds()
-            self.min_empty_waitlist_seconds = int(minutes) / 2 * 60
-            self.update_mode_names()
-            self.update_timer_message()
-            save_settings()
 
-    def increase_font_size(self):
+    def increase_font_size(self) -> bool:
         settings["font size"] += 1
-        self.update_font()
+        return True
 
-    def decrease_font_size(self):
+    def decrease_font_size(self) -> bool:
         if settings["font size"] <= 1:
-            return
+            return False
         settings["font size"] -= 1
-        self.update_font()
+        return True
 
-    def save_all_students(self):
-        """Saves all student names and the next's wait time to the database.
+    def schedule_tick(self) -> None:
+        """Schedules the next tick for when the shown time next changes.
 
-        Every row of the seconds column receives the same number: the next student's
-        wait time.
+        If no timer is counting, no tick is scheduled.
         """
-        with sqlite3.connect("students.db") as conn:
-            conn.execute("DELETE FROM students")
-            cursor = conn.cursor()
-            for name in self.student_names:
-                cursor.execute(
-                    "INSERT INTO students (name, seconds) VALUES (?, ?)",
-                    (name, self.individual_seconds),
-                )
-            conn.commit()
+        delay = self.engine.get_time_until_change()
+        if delay is None:
+            self.timer.stop()
+        else:
+            self.timer.start(math.ceil(delay * 1000))
+            if instrumentation.ENABLED:
+                self.__tick_due = monotonic() + delay
 
+    @instrumentation.timed("tick")
     def tick(self) -> None:
-        """Called once each second; controls the timer."""
-        if (
-            self.student_names
-            and self.individual_seconds
-            and not self.paused
-            and (
-                (
-                    self.current_mode == Mode.INDIVIDUAL
-                    and (len(self.student_names) > 1)
-                    or (
-                        len(self.student_names) == 1
-                        and self.student_names[0].endswith("-minute break")
-                    )
-                )
-                or self.individual_seconds > self.min_empty_waitlist_seconds
+        """Called by the timer; ticks the engine and plays its alerts.
+
+        Each tick schedules the next one.
+        """
+        if self.__tick_due is not None:
+            # how long after the shown time should have changed the tick happened
+            instrumentation.record("tick lateness", monotonic() - self.__tick_due)
+            self.__tick_due = None
+        alert = self.engine.tick()
+        if alert is not None and self.alerts is not None:
+            self.alerts.play(alert)
+        self.schedule_tick()
+
+    def toggle_stats_overlay(self):
+        """Shows or hides the instrumentation statistics over the window."""
+        if self.stats_overlay is None:
+            self.stats_overlay = QLabel(self)
+            self.stats_overlay.setFont(QFont("DejaVu Sans Mono", 11))
+            self.stats_overlay.setStyleSheet(
+                "color: white; background-color: rgba(0, 0, 0, 210); padding: 10px;"
             )
-        ):
-            self.individual_seconds -= 1
-            self.update_timer_message()
-        if self.current_mode == Mode.GROUP and self.student_names:
-            self.group_seconds += 1
-            self.update_timer_message()
-        if self.individual_seconds == settings["transition seconds"]:
-            chime.warning()
-        elif self.individual_seconds == 1:
-            chime.error()
+            self.stats_overlay.move(10, 10)
+            self.stats_overlay.hide()
+            self.stats_timer = QTimer(self)
+            self.stats_timer.timeout.connect(self.update_stats_overlay)
+        if self.stats_overlay.isHidden():
+            self.update_stats_overlay()
+            self.stats_overlay.show()
+            self.stats_overlay.raise_()
+            self.stats_timer.start(1000)
+        else:
+            self.stats_timer.stop()
+            self.stats_overlay.hide()
+
+    def update_stats_overlay(self):
+        self.stats_overlay.setText(instrumentation.get_report())
+        self.stats_overlay.adjustSize()
 
     def toggle_fullscreen(self):
         if self.isMaximized():
@@ -266,112 +373,134 @@ class ZQ(QWidget):
         elif self.timer_message.hasFocus():
             self.timer_message.copy()
 
-    def handle_char_key_pressed(self, key: str):
-        if key == "h":
-            if self.__showing_help:
-                set_QTextBrowser_text(self.welcome, settings["welcome message"])
-                self.__showing_help = False
-            else:
-                set_QTextBrowser_text(self.welcome, get_help_text())
-                self.__showing_help = True
-                self.__showing_about = False
-        elif key == "@":
-            if self.__showing_about:
-                set_QTextBrowser_text(self.welcome, settings["welcome message"])
-                self.__showing_about = False
-            else:
-                set_QTextBrowser_text(self.welcome, get_about_text(VERSION))
-                self.__showing_about = True
-                self.__showing_help = False
-        elif key == "o":
-            self.line_edit.releaseKeyboard()
-            settings_dialog = SettingsDialog()
-            user_clicked_save = settings_dialog.exec()
-            if user_clicked_save:
-                if not self.__showing_help and not self.__showing_about:
-                    set_QTextBrowser_text(self.welcome, settings["welcome message"])
-                self.update_font()
-                self.update_mode_names()
-                self.update_max_individual_seconds()
-                self.update_timer_message()
-            self.line_edit.grabKeyboard()
-        elif key == "n" and len(self.student_names):
-            (
-                self.student_names,
-                self.individual_seconds,
-                self.previous_individual_seconds,
-            ) = go_to_next_student(
-                self.student_names, self.individual_seconds, self.max_individual_seconds
-            )
-        elif (
-            key == "z"
-            and self.previous_individual_seconds is not None
-            and self.student_names
-        ):
-            (
-                self.student_names,
-                self.individual_seconds,
-                self.previous_individual_seconds,
-            ) = return_to_previous_meeting(
-                self.student_names,
-                self.individual_seconds,
-                self.previous_individual_seconds,
-            )
-        elif key == "!":
-            (self.student_names, self.individual_seconds) = remove_last_student(
-                self.student_names, self.individual_seconds, self.max_individual_seconds
-            )
-        elif key == "b":
-            minutes = add_5_minute_break(self.student_names)
-            if len(self.student_names) == 1:
-                self.individual_seconds = minutes * 60
-        elif key == "$":  # randomize the order of the students in the queue
-            random.shuffle(self.student_names)
-        elif key == "m":
-            if self.current_mode == Mode.GROUP:
-                self.current_mode = Mode.INDIVIDUAL
-            else:
-                self.current_mode = Mode.GROUP
-                self.group_seconds = 0
-        elif key == "home":
-            # change the meeting mode to say that tutoring hours start soon
-            self.current_mode = Mode.START
-        elif key == "end":
-            # change the meeting mode to say that tutoring hours end soon
-            self.current_mode = Mode.END
-        elif key in ("k", " "):
-            # pause the timers
-            self.paused = not self.paused
-        elif key == "j":
-            # add 5 seconds to the current meeting
-            self.individual_seconds += 5
-        elif key == "l":
-            # subtract up to 5 seconds from the current meeting
-            if self.individual_seconds >= 5:
-                self.individual_seconds -= 5
-            else:
-                self.individual_seconds = 0
-        elif key == "left":
-            # add 30 seconds to the current meeting
-            self.individual_seconds += 30
-        elif key == "right":
-            # subtract up to 30 seconds from the current meeting
-            if self.individual_seconds >= 30:
-                self.individual_seconds -= 30
-            else:
-                self.individual_seconds = 0
-        elif key == "r":
-            # reset the timer
-            names = self.student_names
-            if names and names[0].endswith("-minute break"):
-                self.individual_seconds = int(names[0].split("-")[0]) * 60
-            else:
-                self.individual_seconds = self.max_individual_seconds
-            self.paused = True
-        elif key == "s":
-            self.save_all_students()
-        elif key in "=+":
-            self.increase_font_size()
-        elif key in "-_":
-            self.decrease_font_size()
-        self.update_timer_message()
+    def get_commands(self) -> dict[str, Command]:
+        """Returns every command that can be bound to a key in the keymap, by name."""
+        engine = self.engine
+        return {
+            "toggle help": Command("toggles this help message.", self.toggle_help),
+            "toggle about": Command("shows info about this app.", self.toggle_about),
+            "increase font size": Command(
+                "increases font size.", self.increase_font_size
+            ),
+            "decrease font size": Command(
+                "decreases font size.", self.decrease_font_size
+            ),
+            "open settings": Command("opens the settings.", self.open_settings),
+            "add student": Command(
+                "allows you to enter a student's name to add them to the queue.",
+                self.line_edit.start_new_name_input,
+            ),
+            "next student": Command(
+                "brings the next student to the front of the queue, and rotates the"
+                " previously front student to the end.",
+                engine.next_student,
+            ),
+            "previous student": Command(
+                "brings the previous student back to the front of the queue.",
+                engine.previous_student,
+            ),
+            "remove last": Command(
+                "removes the last student in the queue.", engine.remove_last
+            ),
+            "remove student": Command(
+                "removes a student from the queue by name.",
+                self.line_edit.start_existing_name_input,
+            ),
+            "add break": Command(
+                "adds a 5 minute break to the end of the queue.", engine.add_break
+            ),
+            "shuffle": Command("randomizes the order of the queue.", engine.shuffle),
+            "toggle mode": Command(
+                "toggles the meeting mode between group and individual meetings.",
+                engine.toggle_mode,
+            ),
+            "start mode": Command(
+                "changes the meeting mode to display a message saying tutoring hours"
+                " will start soon.",
+                engine.set_mode,
+                Mode.START,
+            ),
+            "end mode": Command(
+                "changes the meeting mode to display a message saying tutoring hours"
+                " will soon end.",
+                engine.set_mode,
+                Mode.END,
+            ),
+            "toggle pause": Command(
+                "pauses/unpauses the individual meetings timer.", engine.toggle_pause
+            ),
+            "add 5 seconds": Command(
+                "adds 5 seconds to the individual meetings timer.",
+                engine.add_seconds,
+                5,
+            ),
+            "subtract 5 seconds": Command(
+                "subtracts 5 seconds from the individual meetings timer.",
+                engine.add_seconds,
+                -5,
+            ),
+            "add 30 seconds": Command(
+                "adds 30 seconds to the individual meetings timer.",
+                engine.add_seconds,
+                30,
+            ),
+            "subtract 30 seconds": Command(
+                "subtracts 30 seconds from the individual meetings timer.",
+                engine.add_seconds,
+                -30,
+            ),
+            "reset timer": Command(
+                "resets the individual meetings timer.", engine.reset_timer
+            ),
+            "change meeting minutes": Command(
+                "allows you to change the individual meetings duration (in minutes).",
+                self.line_edit.start_minutes_input,
+            ),
+            "save": Command("saves the whole queue again.", engine.save_all),
+            "paste names": Command(
+                "adds each name in the clipboard to the end of the queue. Names can be"
+                " separated by new lines or commas.",
+                self.paste_names,
+            ),
+            "undo": Command(
+                "undoes the last change to the queue or timers.", engine.undo
+            ),
+            "redo": Command("redoes the last undone change.", engine.redo),
+            "copy": Command("copies the selected text.", self.copy),
+            "close": Command("closes the app.", self.close),
+            "toggle fullscreen": Command("toggles fullscreen.", self.toggle_fullscreen),
+            "toggle statistics": Command(
+                "shows or hides the performance statistics.", self.toggle_stats_overlay
+            ),
+        }
+
+    def toggle_help(self) -> bool:
+        if self.__showing_help:
+            self.welcome.set_text(settings["welcome message"])
+            self.__showing_help = False
+        else:
+            self.welcome.set_text(get_help_text(self.keymap.get_shortcuts()))
+            self.__showing_help = True
+            self.__showing_about = False
+        return True
+
+    def toggle_about(self) -> bool:
+        if self.__showing_about:
+            self.welcome.set_text(settings["welcome message"])
+            self.__showing_about = False
+        else:
+            self.welcome.set_text(get_about_text(VERSION))
+            self.__showing_about = True
+            self.__showing_help = False
+        return True
+
+    def open_settings(self) -> bool:
+        self.line_edit.releaseKeyboard()
+        try:
+            from settings_dialog import SettingsDialog
+        except ImportError:
+            from .settings_dialog import SettingsDialog
+        settings_dialog = SettingsDialog()
+        settings_dialog.exec()  # the settings' subscribers apply any changes
+        self.line_edit.grabKeyboard()
+        return False
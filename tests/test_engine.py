@@ -0,0 +1,158 @@
+"""Randomized tests of the engine's undo and redo and of saving to the database.
+
+Each test runs many random operations and checks after each one that the queue's
+indexes agree with a naive search of the queue and that a new connection to the
+database loads the same queue and session as the engine has in memory. The clock
+is fake, so the timers only change when a test says so.
+"""
+import random
+
+import common
+import engine
+import pytest
+from common import Break
+from common import Mode
+from engine import Engine
+from storage import Storage
+
+NAMES = "abcdefghij"
+OPERATIONS = (
+    lambda e, rng: e.append_name(rng.choice(NAMES)),
+    lambda e, rng: e.append_names(rng.sample(NAMES, 3)),
+    lambda e, rng: e.remove_name(rng.choice(NAMES)),
+    lambda e, rng: e.remove_last(),
+    lambda e, rng: e.add_break(),
+    lambda e, rng: e.shuffle(),
+    lambda e, rng: e.next_student(),
+    lambda e, rng: e.previous_student(),
+    lambda e, rng: e.toggle_mode(),
+    lambda e, rng: e.toggle_pause(),
+    lambda e, rng: e.add_seconds(rng.choice((-60, 5))),
+    lambda e, rng: e.reset_timer(),
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the monotonic clock with one that only moves when told to."""
+    now = [1000.0]
+    monkeypatch.setattr(common, "monotonic", lambda: now[0])
+    monkeypatch.setattr(engine, "monotonic", lambda: now[0])
+    return now
+
+
+def get_state(e: Engine) -> tuple:
+    return (
+        e.queue.names(),
+        e.current_mode,
+        e.paused,
+        e.individual_seconds,
+        e.group_seconds,
+        e.previous_individual_seconds,
+        e.estimator.mean,
+        e.estimator.variance,
+        e.estimator.count,
+    )
+
+
+def check_queue(e: Engine) -> None:
+    """Checks the queue's name index and wait times against a naive search."""
+    names = e.queue.names()
+    for name in NAMES:
+        index = names.index(name) if name in names else None
+        assert e.queue.find(name) == index
+        assert (name in e.queue) == (index is not None)
+    assert e.queue.suggest_names("", len(names)) == sorted(
+        set(names), key=lambda name: (name.casefold(), name)
+    )
+    waits = []
+    seconds = 0
+    for entry in list(e.queue)[1:]:
+        waits.append((entry, seconds))
+        seconds += entry.seconds if isinstance(entry, Break) else 600
+    assert list(e.queue.iter_waiting(600)) == waits
+
+
+def check_storage(e: Engine, path: str) -> None:
+    """Checks that the database has the same queue and session as the engine."""
+    reloaded = Engine(Storage(path))
+    try:
+        assert get_state(reloaded) == get_state(e)
+    finally:
+        reloaded.close()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_undo_redo_and_storage(tmp_path, clock, seed):
+    rng = random.Random(seed)
+    path = str(tmp_path / "students.db")
+    e = Engine(Storage(path), undo_depth=1000)
+    history = [get_state(e)]
+    position = 0
+    for _ in range(600):
+        r = rng.random()
+        if r < 0.2 and position > 0:
+            assert e.undo()
+            position -= 1
+            assert get_state(e) == history[position]
+        elif r < 0.3 and position < len(history) - 1:
+            assert e.redo()
+            position += 1
+            assert get_state(e) == history[position]
+        else:
+            before = get_state(e)
+            if rng.choice(OPERATIONS)(e, rng):
+                history = history[: position + 1]
+                history.append(get_state(e))
+                position += 1
+            else:
+                assert get_state(e) == before
+        check_queue(e)
+        check_storage(e, path)
+    e.close()
+
+
+def test_meeting_estimate_undo(tmp_path, clock):
+    path = str(tmp_path / "students.db")
+    e = Engine(Storage(path))
+    e.append_names(["Ann", "Bob", "Cat"])
+    e.set_mode(Mode.INDIVIDUAL)
+    if e.paused:
+        e.toggle_pause()
+    clock[0] += 300
+    e.next_student()
+    assert e.estimator.count == 1
+    assert e.meeting_stopwatch.get_elapsed() == 0
+
+    # going back resumes the meeting and forgets what was learned from it
+    clock[0] += 40
+    e.previous_student()
+    assert e.queue.names() == ["Ann", "Bob", "Cat"]
+    assert e.estimator.count == 0
+    assert e.meeting_stopwatch.get_elapsed() == 300
+    e.undo()
+    assert e.estimator.count == 1
+    assert e.meeting_stopwatch.get_elapsed() == 40
+    e.undo()
+    assert e.estimator.count == 0
+    assert e.meeting_stopwatch.get_elapsed() == 300
+
+    # meetings that end within the transition time are not learned from
+    e.next_student()
+    e.next_student()
+    assert e.estimator.count == 1
+    check_storage(e, path)
+    e.close()
+
+
+def test_rotating_one_student_keeps_the_meeting(clock):
+    e = Engine()
+    e.append_name("Ann")
+    e.set_mode(Mode.INDIVIDUAL)
+    if e.paused:
+        e.toggle_pause()
+    for _ in range(3):
+        clock[0] += 300
+        e.next_student()
+    assert e.estimator.count == 0
+    assert e.meeting_stopwatch.get_elapsed() == 900